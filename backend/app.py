@@ -2,17 +2,24 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import jwt, time
-from pymongo import MongoClient, UpdateOne
-from werkzeug.security import generate_password_hash, check_password_hash
+from pymongo import MongoClient, UpdateOne, ReturnDocument
 from dotenv import load_dotenv
 from functools import wraps
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 import os
-import bcrypt
+import gzip
 import requests
-import re
-import joblib
-import pandas as pd
-from model import recommend
+from model import recommend, recommend_batch, result_cache_stats, label_counts, LIST_VOCAB, BATCH_CHUNK_SIZE
+from model_registry import get_classifier, get_batcher
+from search_index import SearchIndexes
+from master_lists import MasterListCache
+from master_writer import MasterListWriter
+from profile_cache import ProfileCache, make_backend
+from roadmaps import RoadmapCatalog, personalize_roadmap
+from token_cache import TokenCache
+from password_pool import PasswordHasher, Overloaded
+from profile_merge import flatten_set, merge_profile, path_key
+from google_keys import GoogleKeySet, KeysUnavailable, verify_id_token, GOOGLE_CERTS_URL
 
 load_dotenv()
 
@@ -23,6 +30,43 @@ CORS(app)
 MONGO_URI = os.getenv("MONGO_URI")
 JWT_SECRET = os.getenv("JWT_SECRET", "supersecret")
 JWT_EXPIRE = int(os.getenv("JWT_EXPIRE", 3600))
+# verified session tokens kept per worker (see token_cache.py)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+# seconds between re-reads of the shared revocation list (Redis only)
+TOKEN_REVOCATION_SYNC = float(os.getenv("TOKEN_REVOCATION_SYNC", 1))
+# overridable so load tests can point at a local fake
+GOOGLE_TOKENINFO_URL = os.getenv("GOOGLE_TOKENINFO_URL", "https://oauth2.googleapis.com/tokeninfo")
+GOOGLE_TIMEOUT = float(os.getenv("GOOGLE_TIMEOUT", 5))
+# "local": check ID token signatures against Google's cached JWKS keys;
+# "tokeninfo": ask GOOGLE_TOKENINFO_URL on every login
+GOOGLE_VERIFY = os.getenv("GOOGLE_VERIFY", "local")
+# JWKS URL, or a file path / file:// URL for offline tests
+GOOGLE_CERTS_SOURCE = os.getenv("GOOGLE_CERTS_URL", GOOGLE_CERTS_URL)
+# must match data-client_id in frontend/index.html
+GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID", "582970056880-adu8ktcm5chepeja5i63kd598ers1o43.apps.googleusercontent.com")
+# load the career classifier on first /predict-career call instead of at startup
+CLASSIFIER_LAZY_LOAD = os.getenv("CLASSIFIER_LAZY_LOAD", "0") == "1"
+PREDICT_TIMEOUT = float(os.getenv("PREDICT_TIMEOUT", 5))
+# route /predict-career through the microbatcher; only worth it when a worker
+# serves several requests at once (gthread, or the async mode's thread pool)
+PREDICT_BATCHING = os.getenv("PREDICT_BATCHING", "1" if int(os.getenv("GUNICORN_THREADS", 1)) > 1 else "0") == "1"
+# largest /api/recommend/batch body accepted (profiles per request)
+RECOMMEND_BATCH_MAX = int(os.getenv("RECOMMEND_BATCH_MAX", 1000))
+# profile read cache (see profile_cache.py); PROFILE_CACHE_URL=redis://... shares it between workers.
+# A per-worker cache would keep serving a profile another worker just saved,
+# so without Redis it is off unless PROFILE_CACHE_TTL is set (single worker only).
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", 10000))
+PROFILE_CACHE_URL = os.getenv("PROFILE_CACHE_URL", "")
+PROFILE_CACHE_SHARED = PROFILE_CACHE_URL.startswith(("redis://", "rediss://"))
+PROFILE_CACHE_TTL = int(os.getenv("PROFILE_CACHE_TTL", 60 if PROFILE_CACHE_SHARED else 0))
+if PROFILE_CACHE_TTL > 0 and not PROFILE_CACHE_SHARED and int(os.getenv("WEB_CONCURRENCY", 2)) > 1:
+    print("warning: per-worker profile cache with several workers; saves in one worker are not seen by the others")
+# password hashing pool (see password_pool.py): CPU cap and backlog limit per worker
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", 32))
+# dump incoming profile payloads to stdout (development only)
+DEBUG_PROFILE_LOG = os.getenv("DEBUG_PROFILE_LOG", "0") == "1"
 
 # --- DB setup ---
 client = MongoClient(MONGO_URI)
@@ -33,6 +77,7 @@ master_skills = db["master_skills"]
 master_interests = db["master_interests"]
 master_strengths = db["master_strengths"]
 master_weaknesses = db["master_weaknesses"]
+counters = db["counters"]
 
 for coll in (master_skills, master_interests, master_strengths, master_weaknesses):
     try:
@@ -40,19 +85,237 @@ for coll in (master_skills, master_interests, master_strengths, master_weaknesse
     except Exception:
         pass
 
-def get_email_from_token(auth_header):
+# master collection -> recommender list column
+MASTER_FIELDS = {
+    master_skills.name: "skills",
+    master_interests.name: "interests",
+    master_strengths.name: "strengths",
+    master_weaknesses.name: "weaknesses",
+}
+
+# master collections share the recommender's interned vocabularies, so a
+# name has the same int ID in the dataset, in profiles and in master lists
+MASTER_VOCAB = {name: LIST_VOCAB[field] for name, field in MASTER_FIELDS.items()}
+
+# where saved profiles keep each list (section saves and full-profile saves)
+PROFILE_LIST_PATHS = {
+    "skills": ("profile.skills", "profile.skills.skills"),
+    "interests": ("profile.interests", "profile.interests.interests"),
+    "strengths": ("profile.strengthsWeaknesses.strengths", "profile.strengths"),
+    "weaknesses": ("profile.strengthsWeaknesses.weaknesses", "profile.weaknesses"),
+}
+
+def sync_master_vocab():
+    """Intern every name already stored in the master collections."""
+    for coll in (master_skills, master_interests, master_strengths, master_weaknesses):
+        vocab = MASTER_VOCAB[coll.name]
+        names = [d.get("name") for d in coll.find({}, {"_id": 0, "name": 1})]
+        for n in names:
+            vocab.add(n)
+        master_writer.mark_known(coll.name, names)
+
+if not CLASSIFIER_LAZY_LOAD:
+    get_classifier()
+
+def master_popularity(coll_name):
+    """name -> how many dataset rows and saved profiles use it (search ranking boost)."""
+    field = MASTER_FIELDS[coll_name]
+    counts = label_counts(field)
+    for path in PROFILE_LIST_PATHS[field]:
+        try:
+            docs = users.aggregate([
+                {"$unwind": f"${path}"},
+                {"$match": {path: {"$type": "string"}}},
+                {"$group": {"_id": f"${path}", "n": {"$sum": 1}}},
+            ])
+            for d in docs:
+                name = d["_id"].strip()
+                counts[name] = counts.get(name, 0) + d["n"]
+        except Exception as e:
+            print("profile popularity failed:", e)
+    return counts
+
+# ranked typeahead index for /api/search-* (see search_index.py);
+# popularity is recounted whenever an index reloads (in the background)
+SEARCH_INDEX_TTL = int(os.getenv("SEARCH_INDEX_TTL", 300))
+SEARCH_LIMIT = 50
+search_indexes = SearchIndexes(
+    (master_skills, master_interests, master_strengths, master_weaknesses),
+    ttl=SEARCH_INDEX_TTL,
+    popularity=master_popularity,
+)
+search_indexes.warm()
+
+def search_master(coll):
+    """
+    ?q= -> ranked, typo-tolerant matches.
+    ?mode=substring keeps the old literal, alphabetical behaviour.
+    """
+    q = request.args.get("q", "")
+    index = search_indexes.get(coll)
+    if request.args.get("mode") == "substring":
+        return jsonify(index.search(q, limit=SEARCH_LIMIT, skip_blank=coll is master_skills))
+    return jsonify(index.ranked(q, limit=SEARCH_LIMIT))
+
+# cached /api/get-* lists (see master_lists.py); grow_master_list bumps them
+MASTER_LIST_TTL = int(os.getenv("MASTER_LIST_TTL", 300))
+MASTER_LIST_MAX_AGE = int(os.getenv("MASTER_LIST_MAX_AGE", 60))
+# ?since= deltas resend this many earlier versions (see MasterListCache.delta)
+MASTER_VERSION_OVERLAP = int(os.getenv("MASTER_VERSION_OVERLAP", 50))
+master_lists = MasterListCache(
+    (master_skills, master_interests, master_strengths, master_weaknesses),
+    limit=500,
+    ttl=MASTER_LIST_TTL,
+    skip_blank=(master_skills.name,),
+)
+
+def master_list_response(coll):
+    """Cached list body with a strong ETag; 304 when the client's copy matches."""
+    entry = master_lists.get(coll)
+    resp = app.response_class(entry.body, mimetype="application/json")
+    resp.set_etag(entry.etag)
+    resp.headers["Cache-Control"] = f"public, max-age={MASTER_LIST_MAX_AGE}"
+    return resp.make_conditional(request)
+
+def next_master_version():
+    """Shared, increasing stamp for newly inserted master names (?since= on /api/master-lists)."""
+    doc = counters.find_one_and_update(
+        {"_id": "master_lists"},
+        {"$inc": {"v": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc["v"]
+
+def write_master_names(coll_name, names):
+    """Upsert new names into a master collection (runs on the master writer thread)."""
+    coll = db[coll_name]
+    v = next_master_version()
+    result = coll.bulk_write(
+        [UpdateOne({"name": n}, {"$setOnInsert": {"name": n, "v": v}}, upsert=True) for n in names],
+        ordered=False,
+    )
+    if result.upserted_count:
+        master_lists.bump(coll_name)
+    vocab = MASTER_VOCAB[coll_name]
+    for n in names:
+        vocab.add(n)
+    search_indexes.add(coll_name, names)
+
+# master-list growth happens off the request path (see master_writer.py)
+MASTER_WRITE_BATCH = int(os.getenv("MASTER_WRITE_BATCH", 500))
+MASTER_WRITE_FLUSH_MS = float(os.getenv("MASTER_WRITE_FLUSH_MS", 200))
+master_writer = MasterListWriter(
+    write_master_names,
+    max_items=MASTER_WRITE_BATCH,
+    flush_interval=MASTER_WRITE_FLUSH_MS / 1000,
+)
+
+try:
+    sync_master_vocab()
+except Exception as e:
+    print("master vocab sync failed:", e)
+
+def grow_master_list(coll, names):
+    """Queue names for their master collection; new ones are upserted in the background."""
+    master_writer.enqueue(coll.name, names)
+
+# user documents as the profile endpoints return them
+USER_PROJECTION = {"password": 0, "_id": 0}
+profile_cache = ProfileCache(
+    maxsize=PROFILE_CACHE_SIZE,
+    ttl=PROFILE_CACHE_TTL,
+    backend=make_backend(PROFILE_CACHE_URL),
+)
+
+def load_user(email):
+    """User document without password/_id, served from the profile cache."""
+    return profile_cache.get(email, lambda: users.find_one({"email": email}, USER_PROJECTION))
+
+def update_user(email, update):
+    """Apply an update (upserting) and write the resulting document through the cache."""
+    doc = users.find_one_and_update(
+        {"email": email},
+        update,
+        projection=USER_PROJECTION,
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    profile_cache.put(email, doc)
+    return doc
+
+def issue_token(email):
+    return jwt.encode({"email": email, "exp": time.time() + JWT_EXPIRE}, JWT_SECRET, algorithm="HS256")
+
+def google_claims(payload):
+    """tokeninfo payload -> (email, fullname, picture)."""
+    fullname = payload.get("name") or payload.get("given_name") or ""
+    return payload.get("email"), fullname, payload.get("picture")
+
+password_hasher = PasswordHasher(PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE)
+
+def busy_response():
+    resp = jsonify({"success": False, "message": "Too many sign-ins right now, please retry"})
+    resp.status_code = 503
+    resp.headers["Retry-After"] = "1"
+    return resp
+
+google_keys = GoogleKeySet(GOOGLE_CERTS_SOURCE, timeout=GOOGLE_TIMEOUT)
+
+def verify_google_credential(credential):
+    """
+    Claims of a valid Google ID token, else None. Raises KeysUnavailable or
+    requests.RequestException when Google can't be reached.
+    """
+    if GOOGLE_VERIFY == "tokeninfo":
+        resp = requests.get(GOOGLE_TOKENINFO_URL, params={"id_token": credential}, timeout=GOOGLE_TIMEOUT)
+        return resp.json() if resp.status_code == 200 else None
+    try:
+        return verify_id_token(credential, google_keys, GOOGLE_CLIENT_ID)
+    except jwt.PyJWTError:
+        return None
+
+def new_google_user(email, fullname, picture):
+    return {
+        "fullname": fullname,
+        "email": email,
+        "auth_provider": "google",
+        "picture": picture,
+        "created_at": time.time()
+    }
+
+def google_user_update(user, fullname, picture):
+    """Fields of an existing user that the Google profile changed."""
+    update = {}
+    if fullname and user.get("fullname") != fullname:
+        update["fullname"] = fullname
+    if picture and user.get("picture") != picture:
+        update["picture"] = picture
+    return update
+
+# revocations go through the profile cache's Redis when there is one
+token_cache = TokenCache(
+    TOKEN_CACHE_SIZE,
+    backend=profile_cache.backend if PROFILE_CACHE_SHARED else None,
+    sync_interval=TOKEN_REVOCATION_SYNC,
+)
+
+def decode_token(token):
+    return jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+
+def bearer_token(auth_header):
     if not auth_header:
         return None
     parts = auth_header.split()
     if len(parts) == 2:
-        token = parts[1]
-    else:
-        return None
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-        return payload.get("email")
-    except Exception:
+        return parts[1]
+    return None
+
+def get_email_from_token(auth_header):
+    token = bearer_token(auth_header)
+    if token is None:
         return None
+    return token_cache.email(token, decode_token)
 
 def auth_required(f):
     @wraps(f)
@@ -63,108 +326,35 @@ def auth_required(f):
         return f(email=email, *args, **kwargs)
     return wrapper
 
-def pick_format_hint(learning_formats):
-    """
-    Simple heuristic based on user's preferred learning formats.
-    Adjust strings to match whatever you actually store.
-    """
-    if not learning_formats:
-        return "Use a mix of video, text, and projects."
-
-    lf = [str(s).lower() for s in learning_formats]
-
-    if any("video" in s for s in lf):
-        return "Prefer video courses and recorded lectures."
-    if any("project" in s or "hands-on" in s for s in lf):
-        return "Prefer project-based resources and practical tasks."
-    if any("text" in s or "reading" in s for s in lf):
-        return "Prefer articles, documentation, and books."
-
-    return "Use a mix of video, text, and projects."
+# roadmap templates served from memory (see roadmaps.py)
+ROADMAP_CACHE_TTL = int(os.getenv("ROADMAP_CACHE_TTL", 300))
+roadmap_catalog = RoadmapCatalog(roadmaps_collection, ttl=ROADMAP_CACHE_TTL)
+roadmap_catalog.warm()
+# personalizes the top-k roadmaps of one /api/pathfinder call in parallel
+roadmap_pool = ThreadPoolExecutor(max_workers=int(os.getenv("ROADMAP_WORKERS", 4)), thread_name_prefix="roadmap")
+PATHFINDER_MAX_K = 10
 
-
-def personalize_roadmap(roadmap_doc, profile):
+def select_fields(value, fields):
     """
-    Takes a roadmap template and a user profile dict,
-    returns a personalized roadmap structure.
+    Keep only the dotted paths in `fields` ("results.career,results.roadmap.skill_gaps").
+    Lists are projected element-wise; unknown paths are ignored.
     """
-    # User skills
-    user_skills = [s.lower() for s in profile.get("skills", []) if isinstance(s, str)]
-    user_skills_set = set(user_skills)
-
-    # Learning preferences
-    learning_formats = profile.get("learning_formats", []) or []
-    learning_pace = (profile.get("learning_pace") or "moderate").lower()
-
-    # Skills from roadmap
-    core_skills = [s.lower() for s in roadmap_doc.get("core_skills", [])]
-    nice_skills = [s.lower() for s in roadmap_doc.get("nice_to_have_skills", [])]
-
-    # Gaps: skills in roadmap but not in user profile
-    core_gaps = [s for s in core_skills if s not in user_skills_set]
-    nice_gaps = [s for s in nice_skills if s not in user_skills_set]
-
-    # Learning pace → duration multiplier
-    pace_factor_map = {
-        "fast": 0.75,
-        "moderate": 1.0,
-        "slow": 1.5
-    }
-    pace_factor = pace_factor_map.get(learning_pace, 1.0)
-
-    personalized_phases = []
-    for phase in roadmap_doc.get("phases", []):
-        base_duration = phase.get("recommended_duration_months", 3)
-
-        phase_copy = {
-            "id": phase.get("id"),
-            "title": phase.get("title"),
-            "recommended_duration_months": base_duration,
-            "personalized_duration_months": round(base_duration * pace_factor, 1),
-        }
-
-        personalized_tasks = []
-        for task in phase.get("tasks", []):
-            related = [s.lower() for s in task.get("related_skills", [])]
-            task_copy = {
-                "id": task.get("id"),
-                "title": task.get("title"),
-                "description": task.get("description"),
-                "level": task.get("level"),
-                "related_skills": task.get("related_skills", []),
-            }
-
-            # Priority + status
-            if related and all(skill in user_skills_set for skill in related):
-                priority = "low"
-                status = "already strong"
-            elif any(skill in core_gaps + nice_gaps for skill in related):
-                priority = "high"
-                status = "focus"
-            else:
-                priority = "medium"
-                status = "normal"
-
-            task_copy["priority"] = priority
-            task_copy["status"] = status
-            task_copy["preferred_format_hint"] = pick_format_hint(learning_formats)
-
-            personalized_tasks.append(task_copy)
-
-        phase_copy["tasks"] = personalized_tasks
-        personalized_phases.append(phase_copy)
-
-    return {
-        "career": roadmap_doc.get("career"),
-        "slug": roadmap_doc.get("slug"),
-        "short_description": roadmap_doc.get("short_description"),
-        "skill_gaps": {
-            "core_missing": core_gaps,
-            "nice_to_have_missing": nice_gaps
-        },
-        "phases": personalized_phases,
-        "recommended_courses": roadmap_doc.get("recommended_courses", [])
-    }
+    tree = {}
+    for path in fields:
+        node = tree
+        for part in path.split("."):
+            node = node.setdefault(part, {})
+
+    def project(v, node):
+        if not node:
+            return v
+        if isinstance(v, list):
+            return [project(x, node) for x in v]
+        if isinstance(v, dict):
+            return {k: project(v[k], sub) for k, sub in node.items() if k in v}
+        return v
+
+    return project(value, tree)
 
 @app.post("/api/register")
 def register():
@@ -180,8 +370,11 @@ def register():
     if users.find_one({"email": email}):
         return jsonify({"success": False, "message": "Email already registered"}), 400
 
-    # use werkzeug's generate_password_hash for storage
-    hashed = generate_password_hash(password)
+    # werkzeug hash, computed on the hashing pool
+    try:
+        hashed = password_hasher.hash(password)
+    except Overloaded:
+        return busy_response()
     users.insert_one({
         "fullname": fullname,
         "email": email,
@@ -190,7 +383,7 @@ def register():
         "created_at": time.time()
     })
 
-    token = jwt.encode({"email": email, "exp": time.time() + JWT_EXPIRE}, JWT_SECRET, algorithm="HS256")
+    token = issue_token(email)
     return jsonify({"success": True, "token": token, "user": {"fullname": fullname, "email": email}})
 
 @app.post("/api/login")
@@ -199,10 +392,19 @@ def login():
     email = data.get("email")
     password = data.get("password")
     user = users.find_one({"email": email})
-    if not user or not check_password_hash(user.get("password", ""), password):
+    if not user:
+        return jsonify({"success": False, "msg": "Invalid credentials"}), 401
+    try:
+        ok, new_hash = password_hasher.verify(user.get("password", ""), password)
+    except Overloaded:
+        return busy_response()
+    if not ok:
         return jsonify({"success": False, "msg": "Invalid credentials"}), 401
+    if new_hash:
+        # stored hash used older parameters; skip if the password changed meanwhile
+        users.update_one({"email": email, "password": user["password"]}, {"$set": {"password": new_hash}})
 
-    token = jwt.encode({"email": email, "exp": time.time() + JWT_EXPIRE}, JWT_SECRET, algorithm="HS256")
+    token = issue_token(email)
     return jsonify({"success": True, "token": token, "user": {"fullname": user.get("fullname", ""), "email": user["email"]}})
 
 
@@ -214,98 +416,108 @@ def google_login():
         return jsonify({"success": False, "message": "Missing credential"}), 400
 
     # verify with Google
-    resp = requests.get("https://oauth2.googleapis.com/tokeninfo", params={"id_token": credential}, timeout=5)
-    if resp.status_code != 200:
+    try:
+        payload = verify_google_credential(credential)
+    except (KeysUnavailable, requests.RequestException):
+        return jsonify({"success": False, "message": "Google verification unavailable"}), 502
+    if payload is None:
         return jsonify({"success": False, "message": "Invalid Google token"}), 401
 
-    payload = resp.json()
-    email = payload.get("email")
+    email, fullname, picture = google_claims(payload)
     if not email:
         return jsonify({"success": False, "message": "Google token missing email"}), 400
 
-    fullname = payload.get("name") or payload.get("given_name") or ""
-    picture = payload.get("picture")
-
     # Upsert user
     user = users.find_one({"email": email})
     if not user:
-        users.insert_one({
-            "fullname": fullname,
-            "email": email,
-            "auth_provider": "google",
-            "picture": picture,
-            "created_at": time.time()
-        })
+        users.insert_one(new_google_user(email, fullname, picture))
     else:
-        update = {}
-        if fullname and user.get("fullname") != fullname:
-            update["fullname"] = fullname
-        if picture and user.get("picture") != picture:
-            update["picture"] = picture
+        update = google_user_update(user, fullname, picture)
         if update:
             users.update_one({"email": email}, {"$set": update})
+            profile_cache.invalidate(email)
 
-    token = jwt.encode({"email": email, "exp": time.time() + JWT_EXPIRE}, JWT_SECRET, algorithm="HS256")
+    token = issue_token(email)
     return jsonify({"success": True, "token": token, "user": {"name": fullname, "email": email, "picture": picture}})
 
 
+@app.post("/api/logout")
+@auth_required
+def logout(email):
+    """
+    Revoke the presented token until it expires. Only with a shared store
+    (PROFILE_CACHE_URL=redis://...) does that hold for every worker, after
+    at most TOKEN_REVOCATION_SYNC seconds; "revoked_everywhere" says which
+    one happened.
+    """
+    token = bearer_token(request.headers.get("Authorization"))
+    try:
+        token_cache.revoke(token, decode_token(token)["exp"])
+    except Exception as e:
+        print("token revocation failed:", e)
+        return jsonify({"success": False, "message": "Logout could not be recorded, try again"}), 503
+    return jsonify({"success": True, "revoked_everywhere": token_cache.shared})
+
+
 @app.get("/api/get-skills")
 def get_skills():
-    # project only "name" and ignore broken docs
-    docs = master_skills.find({}, {"_id": 0, "name": 1}).sort("name", 1).limit(500)
-    names = [
-        d["name"]
-        for d in docs
-        if isinstance(d.get("name"), str) and d["name"].strip()
-    ]
-    return jsonify(names)
+    return master_list_response(master_skills)
 
 @app.get("/api/get-interests")
 def get_interests():
-    docs = master_interests.find({}, {"_id": 0}).sort("name", 1).limit(500)
-    return jsonify([d["name"] for d in docs])
+    return master_list_response(master_interests)
 
 @app.get("/api/get-strengths")
 def get_strengths():
-    docs = master_strengths.find({}, {"_id": 0}).sort("name", 1).limit(500)
-    return jsonify([d["name"] for d in docs])
+    return master_list_response(master_strengths)
 
 @app.get("/api/get-weaknesses")
 def get_weaknesses():
-    docs = master_weaknesses.find({}, {"_id": 0}).sort("name", 1).limit(500)
-    return jsonify([d["name"] for d in docs])
+    return master_list_response(master_weaknesses)
+
+@app.get("/api/master-lists")
+def get_master_lists():
+    """
+    All four master lists in one (gzip) response:
+      {"version": 12, "since": null, "lists": {"skills": [...], ...}}
+    ?since=<version> from a previous response returns the names added
+    after it, plus those of the MASTER_VERSION_OVERLAP versions before it
+    ("since" echoed back); an unknown version gets the full lists.
+    Lists are in MongoDB name order (code point order).
+    """
+    since = request.args.get("since", type=int)
+    gzip_ok = request.accept_encodings["gzip"] > 0
+    combined = master_lists.combined(MASTER_FIELDS)
+
+    if since is not None and 0 <= since <= combined.version:
+        body = master_lists.delta(MASTER_FIELDS, since, MASTER_VERSION_OVERLAP)
+        resp = app.response_class(gzip.compress(body) if gzip_ok else body, mimetype="application/json")
+    else:
+        resp = app.response_class(combined.gzip_body if gzip_ok else combined.body, mimetype="application/json")
+        # one tag per encoding: the two bodies differ byte for byte
+        resp.set_etag(combined.etag + ("-gz" if gzip_ok else ""))
+
+    if gzip_ok:
+        resp.headers["Content-Encoding"] = "gzip"
+    resp.headers["Vary"] = "Accept-Encoding"
+    resp.headers["Cache-Control"] = f"public, max-age={MASTER_LIST_MAX_AGE}"
+    return resp.make_conditional(request)
 
 @app.get("/api/search-skills")
 def search_skills():
-    q = request.args.get("q", "")
-    regex = re.compile(re.escape(q), re.IGNORECASE)
-    docs = master_skills.find({"name": regex}, {"_id": 0, "name": 1}).sort("name", 1).limit(50)
-    return jsonify([
-        d["name"]
-        for d in docs
-        if isinstance(d.get("name"), str) and d["name"].strip()
-    ])
+    return search_master(master_skills)
 
 @app.get("/api/search-interests")
 def search_interests():
-    q = request.args.get("q", "")
-    regex = re.compile(re.escape(q), re.IGNORECASE)
-    docs = master_interests.find({"name": regex}, {"_id": 0}).sort("name", 1).limit(50)
-    return jsonify([d["name"] for d in docs])
+    return search_master(master_interests)
 
 @app.get("/api/search-strengths")
 def search_strengths():
-    q = request.args.get("q", "")
-    regex = re.compile(re.escape(q), re.IGNORECASE)
-    docs = master_strengths.find({"name": regex}, {"_id": 0}).sort("name", 1).limit(50)
-    return jsonify([d["name"] for d in docs])
+    return search_master(master_strengths)
 
 @app.get("/api/search-weaknesses")
 def search_weaknesses():
-    q = request.args.get("q", "")
-    regex = re.compile(re.escape(q), re.IGNORECASE)
-    docs = master_weaknesses.find({"name": regex}, {"_id": 0}).sort("name", 1).limit(50)
-    return jsonify([d["name"] for d in docs])
+    return search_master(master_weaknesses)
 
 @app.post("/api/save-fullinfo")
 @auth_required
@@ -316,36 +528,29 @@ def save_fullinfo(email):
     section = payload.get("section")
     section_data = payload.get("data")
 
+    # top-level keys become profile.<key> paths: nested ones can be set whole, these can't
+    keys = [section] if section and isinstance(section, str) else list(payload)
+    bad = [k for k in keys if not path_key(k)]
+    if bad:
+        return jsonify({"success": False, "message": f"Invalid field name: {bad[0]!r}"}), 400
+
     try:
         if section and isinstance(section, str):
             # update only that section (safe merge)
-            users.update_one(
-                {"email": email},
-                {"$set": {f"profile.{section}": section_data}},
-                upsert=True
-            )
+            update_user(email, {"$set": {f"profile.{section}": section_data}})
             # Normalize keys for master updates below
             to_index = {section: section_data}
         else:
-            # Deep merge incoming profile with existing profile
-            existing = users.find_one({"email": email}, {"profile": 1})
-            existing_profile = existing.get("profile", {}) if existing else {}
-
-            def deep_merge(a, b):
-                for k, v in b.items():
-                    if (
-                        k in a and isinstance(a[k], dict) and isinstance(v, dict)
-                    ):
-                        deep_merge(a[k], v)
-                    else:
-                        a[k] = v
-                return a
-
-            merged_profile = deep_merge(existing_profile, payload)
-            print("[DEBUG] Saving merged profile for", email)
-            import pprint; pprint.pprint(merged_profile)
-            users.update_one({"email": email}, {"$set": {"profile": merged_profile}}, upsert=True)
-            to_index = merged_profile
+            # merge server-side: one atomic $set of the changed leaves (see profile_merge.py)
+            if DEBUG_PROFILE_LOG:
+                print("[DEBUG] Saving profile paths for", email)
+                import pprint; pprint.pprint(flatten_set(payload, "profile"))
+            merge_profile(
+                payload,
+                lambda update: update_user(email, update),
+                lambda: (users.find_one({"email": email}, {"_id": 0, "profile": 1}) or {}).get("profile"),
+            )
+            to_index = payload
     except Exception as e:
         return jsonify({"success": False, "message": "DB update failed", "error": str(e)}), 500
 
@@ -360,9 +565,7 @@ def save_fullinfo(email):
             elif isinstance(to_index.get("profile"), dict) and "skills" in to_index.get("profile"):
                 skills = to_index.get("profile").get("skills")
         if skills:
-            ops = [UpdateOne({"name": s}, {"$setOnInsert": {"name": s}}, upsert=True) for s in (skills or [])]
-            if ops:
-                master_skills.bulk_write(ops, ordered=False)
+            grow_master_list(master_skills, skills)
 
         # interests
         interests = None
@@ -372,9 +575,7 @@ def save_fullinfo(email):
             elif isinstance(to_index.get("profile"), dict) and "interests" in to_index.get("profile"):
                 interests = to_index.get("profile").get("interests")
         if interests:
-            ops = [UpdateOne({"name": i}, {"$setOnInsert": {"name": i}}, upsert=True) for i in (interests or [])]
-            if ops:
-                master_interests.bulk_write(ops, ordered=False)
+            grow_master_list(master_interests, interests)
 
         # strengths
         strengths = None
@@ -384,9 +585,7 @@ def save_fullinfo(email):
             elif isinstance(to_index.get("profile"), dict) and "strengths" in to_index.get("profile"):
                 strengths = to_index.get("profile").get("strengths")
         if strengths:
-            ops = [UpdateOne({"name": s}, {"$setOnInsert": {"name": s}}, upsert=True) for s in (strengths or [])]
-            if ops:
-                master_strengths.bulk_write(ops, ordered=False)
+            grow_master_list(master_strengths, strengths)
 
         # weaknesses
         weaknesses = None
@@ -396,9 +595,7 @@ def save_fullinfo(email):
             elif isinstance(to_index.get("profile"), dict) and "weaknesses" in to_index.get("profile"):
                 weaknesses = to_index.get("profile").get("weaknesses")
         if weaknesses:
-            ops = [UpdateOne({"name": w}, {"$setOnInsert": {"name": w}}, upsert=True) for w in (weaknesses or [])]
-            if ops:
-                master_weaknesses.bulk_write(ops, ordered=False)
+            grow_master_list(master_weaknesses, weaknesses)
 
         # achievements removed from auto-indexing to avoid missing master collection
 
@@ -422,7 +619,8 @@ def save_section(email):
         section = data.get("section")
         section_data = data.get("data")
         
-        print(f"DEBUG: Received section={section}, data={section_data}")
+        if DEBUG_PROFILE_LOG:
+            print(f"DEBUG: Received section={section}, data={section_data}")
 
         if not section:
             return jsonify({"success": False, "message": "Missing section"}), 400
@@ -431,24 +629,16 @@ def save_section(email):
             return jsonify({"success": False, "message": "Missing data"}), 400
 
         # update profile.section
-        users.update_one(
-            {"email": email},
-            {"$set": {f"profile.{section}": section_data}},
-            upsert=True
-        )
+        update_user(email, {"$set": {f"profile.{section}": section_data}})
 
         # update master lists only for these:
         if section == "skills":
             skills_list = section_data if isinstance(section_data, list) else section_data.get("skills", [])
-            ops = [UpdateOne({"name": s}, {"$setOnInsert": {"name": s}}, upsert=True) 
-                   for s in skills_list]
-            if ops: master_skills.bulk_write(ops, ordered=False)
+            grow_master_list(master_skills, skills_list)
 
         if section == "interests":
             interests_list = section_data if isinstance(section_data, list) else section_data.get("interests", [])
-            ops = [UpdateOne({"name": i}, {"$setOnInsert": {"name": i}}, upsert=True) 
-                   for i in interests_list]
-            if ops: master_interests.bulk_write(ops, ordered=False)
+            grow_master_list(master_interests, interests_list)
 
          # achievements indexing removed to avoid reliance on master_achievements collection
 
@@ -456,11 +646,8 @@ def save_section(email):
             strengths = section_data.get("strengths", []) if isinstance(section_data, dict) else []
             weaknesses = section_data.get("weaknesses", []) if isinstance(section_data, dict) else []
 
-            ops_s = [UpdateOne({"name": s}, {"$setOnInsert": {"name": s}}, upsert=True) for s in strengths]
-            ops_w = [UpdateOne({"name": w}, {"$setOnInsert": {"name": w}}, upsert=True) for w in weaknesses]
-
-            if ops_s: master_strengths.bulk_write(ops_s, ordered=False)
-            if ops_w: master_weaknesses.bulk_write(ops_w, ordered=False)
+            grow_master_list(master_strengths, strengths)
+            grow_master_list(master_weaknesses, weaknesses)
 
         print(f"DEBUG: Successfully saved section {section}")
         return jsonify({"success": True})
@@ -473,13 +660,13 @@ def save_section(email):
 @app.get("/api/get-fullinfo")
 @auth_required
 def get_fullinfo(email):
-    user = users.find_one({"email": email}, {"password": 0, "_id": 0})
+    user = load_user(email)
     return jsonify({"success": True, "profile": user.get("profile", {})})
 
 @app.get("/api/get_profile")
 @auth_required
 def get_profile(email):
-    user = users.find_one({"email": email}, {"password": 0, "_id": 0})
+    user = load_user(email)
     return jsonify({
         "success": True,
         "profile": user.get("profile", {})
@@ -488,22 +675,52 @@ def get_profile(email):
 @app.get("/api/user-info")
 @auth_required
 def user_info(email):
-    user = users.find_one({"email": email}, {"password": 0, "_id": 0})
+    user = load_user(email)
     if not user:
         return jsonify({"success": False}), 404
     return jsonify({"success": True, "user": {"email": user["email"], "fullname": user.get("fullname", ""), "picture": user.get("picture")}})
 
 @app.post("/predict-career")
 def predict():
-    data = request.json
-    df = pd.DataFrame([data])
-    # Encode categorical columns
-    for col, encoder in label_encoders.items():
-        df[col] = encoder.transform(df[col].astype(str))
-    # Predict
-    pred = model.predict(df)[0]
-    career = career_encoder.inverse_transform([pred])[0]
-    return jsonify({"recommended_career": career})
+    """
+    ML-backed career prediction (models/ovr_logreg_model.joblib).
+    Body:
+    {
+      "skills": [...], "interests": [...],
+      "age": 20, "class10_score": 85, "class12_score": 80, "ug_cgpa": 8.1,
+      "education_level": "UG",       # 10th / 12th / Diploma / UG / PG
+      "top_k": 3
+    }
+    Returns the best class plus the top_k classes shaped like /api/recommend
+    results, with score = predicted probability.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "JSON object body required"}), 400
+
+    try:
+        top_k = int(data.get("top_k", 3))
+    except (TypeError, ValueError):
+        return jsonify({"error": "top_k must be an integer"}), 400
+
+    clf = get_classifier()
+    if PREDICT_BATCHING:
+        # concurrent requests share one vectorized predict_proba (see microbatch.py)
+        try:
+            proba = get_batcher()(data, timeout=PREDICT_TIMEOUT)
+        except FuturesTimeout:
+            resp = jsonify({"success": False, "error": "Prediction timed out, please retry"})
+            resp.status_code = 503
+            resp.headers["Retry-After"] = "1"
+            return resp
+    else:
+        proba = clf.predict_inputs_proba([data])[0]
+    career = clf.classes[int(proba.argmax())]
+    return jsonify({
+        "success": True,
+        "recommended_career": career,
+        "results": clf.format_results(data, proba, top_k),
+    })
 
 @app.post("/api/recommend")
 def api_recommend():
@@ -514,6 +731,68 @@ def api_recommend():
         "results": results
     }
 
+@app.post("/api/recommend/batch")
+def api_recommend_batch():
+    """
+    Score many profiles in one call.
+    Body: { "profiles": [ {...}, ... ], "top_k": 3, "chunk_size": 128 }
+    Returns one results list per profile, in input order.
+    At most RECOMMEND_BATCH_MAX profiles; chunk_size is capped at
+    RECOMMEND_BATCH_CHUNK so each scoring step's memory stays bounded.
+    """
+    data = request.get_json(silent=True) or {}
+    profiles = data.get("profiles")
+    if not isinstance(profiles, list) or not all(isinstance(p, dict) for p in profiles):
+        return jsonify({"success": False, "message": "profiles must be a list of objects"}), 400
+    if len(profiles) > RECOMMEND_BATCH_MAX:
+        return jsonify({"success": False, "message": f"at most {RECOMMEND_BATCH_MAX} profiles per request"}), 413
+
+    try:
+        top_k = int(data.get("top_k", 3))
+        chunk_size = int(data["chunk_size"]) if data.get("chunk_size") else None
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "top_k and chunk_size must be integers"}), 400
+    if chunk_size is not None:
+        chunk_size = max(1, min(chunk_size, BATCH_CHUNK_SIZE))
+
+    results = recommend_batch(profiles, top_k=top_k, chunk_size=chunk_size)
+    return jsonify({"success": True, "results": results})
+
+@app.get("/api/pathfinder")
+@auth_required
+def pathfinder(email):
+    """
+    Stored profile + top-k recommendations + a personalized roadmap per
+    career, in one round trip.
+    Query: ?top_k=3&fields=results.career,results.score,results.roadmap.skill_gaps
+    Response: { success, profile, results: [{career, score, top_skills, roadmap}] }
+    roadmap is null for careers without a template.
+    """
+    try:
+        top_k = min(max(int(request.args.get("top_k", 3)), 1), PATHFINDER_MAX_K)
+    except ValueError:
+        return jsonify({"success": False, "message": "top_k must be an integer"}), 400
+
+    user = load_user(email)
+    profile = (user or {}).get("profile") or {}
+    if not profile:
+        return jsonify({"success": False, "message": "Complete your full info first"}), 404
+
+    results = recommend(profile, top_k=top_k)
+
+    def roadmap_for(career):
+        roadmap = roadmap_catalog.get(career)
+        return personalize_roadmap(roadmap, profile) if roadmap else None
+
+    for item, roadmap in zip(results, roadmap_pool.map(roadmap_for, [r["career"] for r in results])):
+        item["roadmap"] = roadmap
+
+    body = {"success": True, "profile": profile, "results": results}
+    fields = [f.strip() for f in request.args.get("fields", "").split(",") if f.strip()]
+    if fields:
+        body = dict(select_fields(body, fields), success=True)
+    return jsonify(body)
+
 @app.route("/api/roadmap", methods=["POST"])
 def get_roadmap():
     """
@@ -534,20 +813,14 @@ def get_roadmap():
     if not profile:
         return jsonify({"error": "profile is required"}), 400
 
-    # 1. Find roadmap template
-    roadmap_doc = roadmaps_collection.find_one({"career": career}, {"_id": 0})
-
-    if not roadmap_doc:
-        roadmap_doc = roadmaps_collection.find_one(
-            {"career": {"$regex": f"^{career}$", "$options": "i"}},
-            {"_id": 0}
-        )
+    # 1. Find roadmap template (exact, then case-insensitive, then slug)
+    roadmap = roadmap_catalog.get(career)
 
-    if not roadmap_doc:
+    if not roadmap:
         return jsonify({"error": f"No roadmap found for career '{career}'"}), 404
 
     # 2. Personalize using profile
-    personalized = personalize_roadmap(roadmap_doc, profile)
+    personalized = personalize_roadmap(roadmap, profile)
 
     return jsonify(personalized), 200
 
@@ -565,6 +838,21 @@ def debug_roadmaps():
     }), 200
 
 
+@app.get("/api/metrics")
+def metrics():
+    """Process-local performance counters."""
+    return jsonify({
+        "pid": os.getpid(),
+        "classifier_batcher": get_batcher().stats(),
+        "master_writer": master_writer.stats(),
+        "profile_cache": profile_cache.stats(),
+        "google_keys": google_keys.stats(),
+        "password_hasher": password_hasher.stats(),
+        "token_cache": token_cache.stats(),
+        "recommend_cache": result_cache_stats(),
+    })
+
+
 @app.route("/")
 def health():
     return {"status": "EduGuide backend is running"}
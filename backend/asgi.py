@@ -0,0 +1,188 @@
+# asgi.py
+#
+# Async serving mode:
+#   uvicorn asgi:application --port $PORT
+#   gunicorn -k uvicorn.workers.UvicornWorker asgi:application
+#
+# The I/O-bound routes below are served natively by a Quart app: MongoDB
+# through PyMongo's AsyncMongoClient and Google's tokeninfo through httpx,
+# so a slow upstream parks a coroutine instead of a worker thread (with
+# GOOGLE_VERIFY=local the token check usually needs no network; it runs in a
+# thread since an expired key set or unknown kid means a blocking refetch).
+# recommend() is CPU-bound and runs in a process pool. Every other route
+# (and CORS preflight) falls through to the Flask app in app.py via
+# asgiref's WSGI adapter, which runs it on a thread.
+
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+from asgiref.wsgi import WsgiToAsgi
+from pymongo import AsyncMongoClient
+from quart import Quart, request, jsonify
+
+import model
+import app as flask_module
+from google_keys import KeysUnavailable
+
+RECOMMEND_PROCESSES = int(os.getenv("RECOMMEND_PROCESSES", 2))
+
+quart_app = Quart(__name__)
+flask_app = WsgiToAsgi(flask_module.app)
+
+# created per process inside the event loop (see startup)
+mongo = None
+users = None
+http = None
+recommend_pool = None
+
+
+@quart_app.before_serving
+async def startup():
+    global mongo, users, http, recommend_pool
+    mongo = AsyncMongoClient(flask_module.MONGO_URI)
+    users = mongo["careerdb"]["users"]
+    http = httpx.AsyncClient(timeout=flask_module.GOOGLE_TIMEOUT)
+    # forkserver: the pool never inherits this process's threads or event loop;
+    # children import model once and share the dataset snapshot's mmap pages
+    recommend_pool = ProcessPoolExecutor(
+        max_workers=RECOMMEND_PROCESSES,
+        mp_context=multiprocessing.get_context("forkserver"),
+    )
+    if flask_module.GOOGLE_VERIFY != "tokeninfo":
+        # fetch the signing keys off the event loop before the first login
+        try:
+            await asyncio.to_thread(flask_module.google_keys.refresh)
+        except KeysUnavailable as e:
+            print("google keys not loaded at startup:", e)
+
+
+@quart_app.after_serving
+async def shutdown():
+    await http.aclose()
+    await mongo.close()
+    recommend_pool.shutdown(wait=False, cancel_futures=True)
+
+
+@quart_app.after_request
+async def cors(response):
+    # same default as flask_cors.CORS(app)
+    response.headers.setdefault("Access-Control-Allow-Origin", "*")
+    return response
+
+
+async def shared_cache(fn, *args):
+    """
+    Call into the token/profile caches. With PROFILE_CACHE_URL=redis://
+    they make blocking Redis round trips, so run them on a thread; the
+    in-process caches are just dict lookups and run inline.
+    """
+    if flask_module.PROFILE_CACHE_SHARED:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+
+async def auth_email():
+    return await shared_cache(flask_module.get_email_from_token, request.headers.get("Authorization"))
+
+
+async def load_user(email):
+    """Async twin of app.load_user(): same profile cache, async MongoDB read."""
+    doc = await shared_cache(flask_module.profile_cache.lookup, email)
+    if doc is None:
+        doc = await users.find_one({"email": email}, flask_module.USER_PROJECTION)
+        if doc is not None:
+            await shared_cache(flask_module.profile_cache.fill, email, doc)
+    return doc
+
+
+@quart_app.post("/api/google-login")
+async def google_login():
+    data = await request.get_json(silent=True) or {}
+    credential = data.get("credential")
+    if not credential:
+        return jsonify({"success": False, "message": "Missing credential"}), 400
+
+    # verify with Google
+    try:
+        if flask_module.GOOGLE_VERIFY == "tokeninfo":
+            resp = await http.get(flask_module.GOOGLE_TOKENINFO_URL, params={"id_token": credential})
+            payload = resp.json() if resp.status_code == 200 else None
+        else:
+            # usually a cached-key check, but get_key() refetches the key set
+            # synchronously (requests, up to its timeout) when it has expired or
+            # the kid is unknown: keep that off the event loop
+            payload = await asyncio.to_thread(flask_module.verify_google_credential, credential)
+    except (httpx.HTTPError, KeysUnavailable):
+        return jsonify({"success": False, "message": "Google verification unavailable"}), 502
+    if payload is None:
+        return jsonify({"success": False, "message": "Invalid Google token"}), 401
+
+    email, fullname, picture = flask_module.google_claims(payload)
+    if not email:
+        return jsonify({"success": False, "message": "Google token missing email"}), 400
+
+    # Upsert user
+    user = await users.find_one({"email": email})
+    if not user:
+        await users.insert_one(flask_module.new_google_user(email, fullname, picture))
+    else:
+        update = flask_module.google_user_update(user, fullname, picture)
+        if update:
+            await users.update_one({"email": email}, {"$set": update})
+            await shared_cache(flask_module.profile_cache.invalidate, email)
+
+    token = flask_module.issue_token(email)
+    return jsonify({"success": True, "token": token, "user": {"name": fullname, "email": email, "picture": picture}})
+
+
+@quart_app.get("/api/get-fullinfo")
+@quart_app.get("/api/get_profile")
+async def get_fullinfo():
+    email = await auth_email()
+    if not email:
+        return jsonify({"success": False, "message": "Unauthorized"}), 401
+    user = await load_user(email)
+    return jsonify({"success": True, "profile": (user or {}).get("profile", {})})
+
+
+@quart_app.get("/api/user-info")
+async def user_info():
+    email = await auth_email()
+    if not email:
+        return jsonify({"success": False, "message": "Unauthorized"}), 401
+    user = await load_user(email)
+    if not user:
+        return jsonify({"success": False}), 404
+    return jsonify({"success": True, "user": {"email": user["email"], "fullname": user.get("fullname", ""), "picture": user.get("picture")}})
+
+
+@quart_app.post("/api/recommend")
+async def api_recommend():
+    data = await request.get_json(silent=True) or {}
+    profile = data.get("profile")   # FULL profile dict
+    if not isinstance(profile, dict):
+        return jsonify({"success": False, "message": "profile is required"}), 400
+    loop = asyncio.get_running_loop()
+    results = await loop.run_in_executor(recommend_pool, model.recommend, profile)
+    return jsonify({"success": True, "results": results})
+
+
+ASYNC_ROUTES = {
+    (rule.rule, method)
+    for rule in quart_app.url_map.iter_rules()
+    for method in rule.methods
+    if method not in ("HEAD", "OPTIONS")
+}
+
+
+async def application(scope, receive, send):
+    """Route the async endpoints to Quart and everything else to Flask."""
+    if scope["type"] == "lifespan" or (
+        scope["type"] == "http" and (scope["path"], scope["method"]) in ASYNC_ROUTES
+    ):
+        await quart_app(scope, receive, send)
+    else:
+        await flask_app(scope, receive, send)
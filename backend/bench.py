@@ -0,0 +1,453 @@
+# bench.py
+#
+# Small benchmarks for the backend. Linux only (reads /proc).
+#
+#   python backend/bench.py memory --workers 4
+#   python backend/bench.py predict --n 2000
+#   python backend/bench.py search --names 100000
+#   python backend/bench.py roadmap --tasks 500
+#   python backend/bench.py auth --n 20000
+#   MONGO_URI=... python backend/bench.py login --mode both --verify local
+
+import os
+import sys
+import time
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def _mem_mb(pid="self"):
+    """(rss, pss, uss) in MB from /proc/<pid>/smaps_rollup."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return fields.get("Rss", 0) / 1024, fields.get("Pss", 0) / 1024, uss / 1024
+
+
+def _load_csv():
+    """What every worker held before the snapshot: a DataFrame of parsed lists."""
+    import pandas as pd
+    from model import DATA_PATH, LIST_COLS, parse_list
+    profiles = pd.read_csv(DATA_PATH)
+    for col in LIST_COLS:
+        profiles[col] = profiles[col].apply(parse_list)
+    return profiles
+
+
+def _touch_model():
+    """Fault in every page of the memory-mapped dataset via a real request."""
+    import model
+    model.recommend({"skills": ["Python"], "interests": ["AI"]})
+    return model
+
+
+def _import_model():
+    import model
+    return model
+
+
+def bench_memory(workers):
+    """
+    Fork `workers` processes the way gunicorn does and report how much memory
+    each one adds for the recommender dataset:
+      csv      - each worker parses the CSV into its own DataFrame (old behaviour)
+      snapshot - each worker imports model, mapping the shared snapshot files
+      preload  - model imported once in the master before fork (gunicorn.conf.py)
+    Deltas are measured once every worker is loaded, so PSS is split fairly.
+    """
+    import pandas  # noqa: F401  shared interpreter baseline for every mode
+    import scipy.sparse  # noqa: F401
+
+    modes = {
+        # model is imported in the master only for parse_list/DATA_PATH
+        "csv": (_import_model, _load_csv),
+        "snapshot": (None, _touch_model),
+        "preload": (_touch_model, _touch_model),
+    }
+
+    print(f"{'mode':<10} {'workers':>7} {'rss/worker':>11} {'pss/worker':>11} {'uss/worker':>11}")
+    for mode, (in_master, in_worker) in modes.items():
+        ready_r, ready_w = os.pipe()
+        go_r, go_w = os.pipe()
+        master = os.fork()
+        if master == 0:
+            # fresh "master" per mode so earlier modes don't leak into it
+            if in_master:
+                in_master()
+            children = []
+            for _ in range(workers):
+                child = os.fork()
+                if child == 0:
+                    before = _mem_mb()
+                    keep = in_worker()  # noqa: F841  hold it while measuring
+                    os.write(ready_w, f"{os.getpid()} {before[0]} {before[1]} {before[2]}\n".encode())
+                    os.read(go_r, 1)  # stay alive until everyone is measured
+                    os._exit(0)
+                children.append(child)
+            for child in children:
+                os.waitpid(child, 0)
+            os._exit(0)
+
+        lines = b""
+        while lines.count(b"\n") < workers:
+            lines += os.read(ready_r, 4096)
+
+        deltas = []
+        for line in lines.decode().strip().split("\n"):
+            pid, *before = line.split()
+            after = _mem_mb(pid)
+            deltas.append([a - float(b) for a, b in zip(after, before)])
+
+        os.write(go_w, b"x" * workers)
+        os.waitpid(master, 0)
+        for fd in (ready_r, ready_w, go_r, go_w):
+            os.close(fd)
+
+        rss, pss, uss = (sum(d[i] for d in deltas) / len(deltas) for i in range(3))
+        print(f"{mode:<10} {workers:>7} {rss:>9.2f}MB {pss:>9.2f}MB {uss:>9.2f}MB")
+
+
+def _timed(fn, args_list):
+    """Per-call latencies in microseconds."""
+    out = []
+    for args in args_list:
+        t0 = time.perf_counter()
+        fn(args)
+        out.append((time.perf_counter() - t0) * 1e6)
+    return out
+
+
+def _report(name, lat):
+    lat = sorted(lat)
+    pick = lambda q: lat[min(int(q * len(lat)), len(lat) - 1)]
+    print(f"{name:<28} p50 {pick(0.50):>9.1f}us  p99 {pick(0.99):>9.1f}us  mean {sum(lat) / len(lat):>9.1f}us")
+
+
+def _sample_profiles(n, seed=0):
+    """n random dataset-shaped profiles (recommender + classifier fields)."""
+    import random
+    import model
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        p = {col: rng.sample(model.LIST_VOCAB[col].names, min(4, len(model.LIST_VOCAB[col])))
+             for col in model.LIST_COLS}
+        for col in model.SCALAR_COLS:
+            p[col] = rng.choice(model.SCALAR_VOCAB[col].names)
+        p.update(age=rng.randint(16, 30), class10_score=rng.uniform(40, 100),
+                 class12_score=rng.uniform(40, 100), ug_cgpa=rng.uniform(5, 10),
+                 education_level=rng.choice(["12th", "Diploma", "UG", "PG"]))
+        out.append(p)
+    return out
+
+
+def bench_predict(n):
+    """Latency of the heuristic recommend() next to the ML classifier path."""
+    import model
+    from model_registry import get_classifier
+    clf = get_classifier()
+    profiles = _sample_profiles(n)
+
+    _report("recommend()", _timed(model.recommend, profiles))
+    _report("classifier.predict([p])", _timed(lambda p: clf.predict([p]), profiles))
+
+
+def _typo(rng, word):
+    """One random swap / drop / replace, like a hurried typist."""
+    if len(word) < 3:
+        return word
+    i = rng.randrange(len(word) - 1)
+    kind = rng.choice(("swap", "drop", "replace"))
+    if kind == "swap":
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if kind == "drop":
+        return word[:i] + word[i + 1:]
+    return word[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + word[i + 1:]
+
+
+def bench_search(n_names, n_queries):
+    """RankedIndex.ranked() latency over a synthetic master list of n_names."""
+    import random
+    import model
+    from search_index import RankedIndex
+
+    rng = random.Random(0)
+    base = list(model.LIST_VOCAB["skills"].names)
+    words = sorted({w for name in base for w in name.replace("(", " ").replace(")", " ").split() if w.isalpha()})
+    names = set(base)
+    while len(names) < n_names:
+        names.add(" ".join(rng.sample(words, rng.randint(1, 3))) + f" {rng.choice(base)}")
+    popularity = {name: int(rng.paretovariate(1.2)) for name in names}
+
+    t0 = time.perf_counter()
+    index = RankedIndex(names, popularity)
+    print(f"built index over {len(index)} names in {time.perf_counter() - t0:.1f}s")
+
+    pool = rng.sample(index.names, n_queries)
+    queries = {
+        "prefix": [name[:rng.randint(1, 8)] for name in pool],
+        "typo": [_typo(rng, name.split()[0].lower()) for name in pool],
+        "acronym": ["".join(w[0] for w in name.split()[:2]) for name in pool],
+    }
+    for _ in range(200):  # warm up
+        index.ranked(rng.choice(pool)[:4])
+    for kind, qs in queries.items():
+        _report(f"ranked ({kind})", _timed(index.ranked, qs))
+    _report("substring (old order)", _timed(index.search, queries["prefix"]))
+
+
+def _sample_roadmap(rng, n_tasks, n_skills=200, per_phase=25):
+    """Synthetic careerRoadmaps document with n_tasks tasks."""
+    skills = [f"Skill {i}" for i in range(n_skills)]
+    phases = []
+    for p in range(0, n_tasks, per_phase):
+        phases.append({
+            "id": f"phase-{p // per_phase}",
+            "title": f"Phase {p // per_phase}",
+            "recommended_duration_months": rng.choice([1, 2, 3]),
+            "tasks": [
+                {"id": f"task-{t}", "title": f"Task {t}", "description": "...", "level": "beginner",
+                 "related_skills": rng.sample(skills, rng.randint(1, 4))}
+                for t in range(p, min(p + per_phase, n_tasks))
+            ],
+        })
+    return {
+        "career": "Synthetic Career",
+        "slug": "synthetic-career",
+        "core_skills": rng.sample(skills, 30),
+        "nice_to_have_skills": rng.sample(skills, 30),
+        "phases": phases,
+    }
+
+
+def bench_roadmap(n_tasks, n):
+    """personalize_roadmap() on a raw template vs a precompiled one."""
+    import random
+    from roadmaps import CompiledRoadmap, personalize_roadmap
+
+    rng = random.Random(0)
+    doc = _sample_roadmap(rng, n_tasks)
+    skills = [f"Skill {i}" for i in range(200)]
+    profiles = [
+        {"skills": rng.sample(skills, 40), "learning_formats": ["Video"], "learning_pace": "fast"}
+        for _ in range(n)
+    ]
+    compiled = CompiledRoadmap(doc)
+
+    print(f"{n_tasks} tasks, 200 skills")
+    _report("compile template", _timed(CompiledRoadmap, [doc] * n))
+    _report("personalize (raw doc)", _timed(lambda p: personalize_roadmap(doc, p), profiles))
+    _report("personalize (compiled)", _timed(lambda p: personalize_roadmap(compiled, p), profiles))
+
+
+def bench_auth(n):
+    """Per-request cost of checking a session token: jwt.decode every time vs TokenCache."""
+    import jwt
+    from token_cache import TokenCache
+    secret = "bench-secret-" + "x" * 32
+    decode = lambda t: jwt.decode(t, secret, algorithms=["HS256"])
+    # a page's worth of calls per token, like pathfinder.js / fullinfo.js
+    tokens = [jwt.encode({"email": f"user{i}@bench.invalid", "exp": time.time() + 3600}, secret, algorithm="HS256")
+              for i in range(max(1, n // 5))]
+    calls = [tokens[i // 5 % len(tokens)] for i in range(n)]
+    cache = TokenCache()
+    _report("jwt.decode", _timed(decode, calls))
+    _report("TokenCache (cold + 4 hits)", _timed(lambda t: cache.email(t, decode), calls))
+    _report("TokenCache (warm)", _timed(lambda t: cache.email(t, decode), calls))
+    print(cache.stats())
+    # shared revocations (MemoryBackend standing in for Redis): lookups stay
+    # local, the list is re-read on the sync thread
+    from profile_cache import MemoryBackend
+    shared = TokenCache(backend=MemoryBackend())
+    for t in tokens[::10]:
+        shared.revoke(t, time.time() + 3600)
+    _report("TokenCache (shared, cold + 4 hits)", _timed(lambda t: shared.email(t, decode), calls))
+    _report("TokenCache (shared, warm)", _timed(lambda t: shared.email(t, decode), calls))
+
+
+def _fake_tokeninfo(latency):
+    """Local stand-in for Google's tokeninfo: any id_token is valid after `latency` s."""
+    import json
+    import threading
+    from urllib.parse import urlparse, parse_qs
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            token = parse_qs(urlparse(self.path).query).get("id_token", [""])[0]
+            time.sleep(latency)
+            body = json.dumps({"email": f"{token}@bench.invalid", "name": token}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _start_server(mode, port, env, workers, threads):
+    import subprocess
+    import urllib.request
+    env = dict(env, PORT=str(port), WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads))
+    if mode == "sync":
+        cmd = ["gunicorn", "app:app"]
+    else:
+        cmd = ["uvicorn", "asgi:application", "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1).read()
+            return proc
+        except OSError:
+            if proc.poll() is not None:
+                raise SystemExit(f"{mode} server exited with {proc.returncode}")
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit(f"{mode} server did not start")
+
+
+def _signed_credentials(n, audience):
+    """A throwaway RSA key as a JWKS file plus n ID tokens it signed, Google-style."""
+    import json
+    import tempfile
+    import jwt
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private.public_key()))
+    jwk.update(kid="bench", alg="RS256", use="sig")
+    f = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+    json.dump({"keys": [jwk]}, f)
+    f.close()
+    exp = time.time() + 3600
+    tokens = [
+        jwt.encode({"iss": "https://accounts.google.com", "aud": audience, "exp": exp,
+                    "email": f"bench{i}@bench.invalid", "name": f"bench{i}"},
+                   private, algorithm="RS256", headers={"kid": "bench"})
+        for i in range(n)
+    ]
+    return f.name, tokens
+
+
+async def _fire_logins(url, n, concurrency, credentials):
+    import asyncio
+    import httpx
+    sem = asyncio.Semaphore(concurrency)
+    lat, errors = [], 0
+
+    async def one(client, i):
+        nonlocal errors
+        async with sem:
+            t0 = time.perf_counter()
+            r = await client.post(url, json={"credential": credentials[i % len(credentials)]})
+            lat.append((time.perf_counter() - t0) * 1e6)
+            errors += r.status_code != 200
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(client, i) for i in range(n)))
+        elapsed = time.perf_counter() - t0
+    return lat, errors, elapsed
+
+
+def bench_login(mode, verify, n, concurrency, latency, workers, threads, port):
+    """
+    Concurrent /api/google-login throughput, sync (gunicorn app:app) vs
+    async (uvicorn asgi:application). verify="tokeninfo" answers tokeninfo
+    from a local fake that takes `latency` seconds; verify="local" signs
+    tokens with a throwaway key served as a JWKS file. Needs MONGO_URI;
+    the logins upsert users named bench<i>@bench.invalid.
+    """
+    import asyncio
+    if not os.getenv("MONGO_URI"):
+        raise SystemExit("set MONGO_URI to a scratch database")
+    fake = _fake_tokeninfo(latency)
+    env = dict(os.environ, GOOGLE_VERIFY=verify,
+               GOOGLE_TOKENINFO_URL=f"http://127.0.0.1:{fake.server_port}/tokeninfo")
+    if verify == "local":
+        audience = "bench.apps.googleusercontent.com"
+        jwks_path, credentials = _signed_credentials(500, audience)
+        env.update(GOOGLE_CERTS_URL=jwks_path, GOOGLE_CLIENT_ID=audience)
+    else:
+        credentials = [f"bench{i}" for i in range(500)]
+
+    print(f"{n} logins, concurrency {concurrency}, verify {verify}"
+          + (f" (tokeninfo latency {latency * 1000:.0f}ms)" if verify == "tokeninfo" else "")
+          + f", {workers} workers (sync: {threads} threads each)")
+    for m in (["sync", "async"] if mode == "both" else [mode]):
+        proc = _start_server(m, port, env, workers, threads)
+        try:
+            url = f"http://127.0.0.1:{port}/api/google-login"
+            asyncio.run(_fire_logins(url, min(n, concurrency), concurrency, credentials))  # warm-up
+            lat, errors, elapsed = asyncio.run(_fire_logins(url, n, concurrency, credentials))
+        finally:
+            proc.terminate()
+            proc.wait()
+        _report(f"{m:<5} {n / elapsed:>7.0f} req/s  err {errors}", lat)
+    fake.shutdown()
+    if verify == "local":
+        os.unlink(jwks_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("memory", help="per-worker memory of the recommender dataset")
+    p.add_argument("--workers", type=int, default=4)
+
+    p = sub.add_parser("predict", help="recommend() vs classifier latency")
+    p.add_argument("--n", type=int, default=2000)
+
+    p = sub.add_parser("search", help="ranked master-list search latency")
+    p.add_argument("--names", type=int, default=100_000)
+    p.add_argument("--queries", type=int, default=5000)
+
+    p = sub.add_parser("roadmap", help="roadmap personalization latency")
+    p.add_argument("--tasks", type=int, default=500)
+    p.add_argument("--n", type=int, default=500)
+
+    p = sub.add_parser("auth", help="session token check, uncached vs cached")
+    p.add_argument("--n", type=int, default=20000)
+
+    p = sub.add_parser("login", help="concurrent google-login throughput, sync vs async server")
+    p.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+    p.add_argument("--verify", choices=["tokeninfo", "local"], default="tokeninfo")
+    p.add_argument("--n", type=int, default=2000)
+    p.add_argument("--concurrency", type=int, default=200)
+    p.add_argument("--latency", type=float, default=0.1, help="fake tokeninfo delay in seconds")
+    p.add_argument("--workers", type=int, default=2)
+    p.add_argument("--threads", type=int, default=4)
+    p.add_argument("--port", type=int, default=5055)
+
+    args = parser.parse_args()
+    if args.cmd == "memory":
+        bench_memory(args.workers)
+    elif args.cmd == "predict":
+        bench_predict(args.n)
+    elif args.cmd == "search":
+        bench_search(args.names, args.queries)
+    elif args.cmd == "roadmap":
+        bench_roadmap(args.tasks, args.n)
+    elif args.cmd == "auth":
+        bench_auth(args.n)
+    elif args.cmd == "login":
+        bench_login(args.mode, args.verify, args.n, args.concurrency, args.latency, args.workers, args.threads, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+# build_snapshot.py
+#
+# Compile ml_data/final_dataset.csv into the binary snapshot that model.py
+# memory-maps at import. model.py rebuilds a stale snapshot on its own;
+# run this at build/deploy time so workers never pay for it on boot.
+#
+#   python backend/build_snapshot.py           # build if missing/stale
+#   python backend/build_snapshot.py --force   # always recompile
+
+import sys
+
+import model
+import snapshot
+
+if __name__ == "__main__":
+    checksum = snapshot.file_checksum(model.DATA_PATH)
+
+    if "--force" in sys.argv:
+        arrays, meta = model.compile_dataset(model.DATA_PATH)
+        path = snapshot.save(model.SNAPSHOT_ROOT, checksum, arrays, meta, replace=True)
+    else:
+        path = snapshot.snapshot_path(model.SNAPSHOT_ROOT, checksum)
+
+    print("Dataset snapshot:", path)
@@ -0,0 +1,185 @@
+# google_keys.py
+#
+# Local verification of Google Sign-In ID tokens.
+# Google signs ID tokens (RS256) with keys published as a JWKS document
+# that rotates every few days and is served with a Cache-Control max-age.
+# GoogleKeySet keeps the parsed keys in-process for that long and a daemon
+# thread refetches them shortly before they expire, so verifying a token
+# is a signature check plus claim checks, with no network round trip.
+#
+# The source can also be a JWKS file (path or file:// URL), re-read every
+# `file_ttl` seconds, for offline tests and load tests.
+
+import os
+import re
+import json
+import time
+import threading
+
+import jwt
+import requests
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+def cache_ttl(headers, default):
+    """Seconds a response may be cached: Cache-Control max-age minus Age."""
+    m = _MAX_AGE.search(headers.get("Cache-Control", ""))
+    if not m:
+        return default
+    try:
+        age = int(headers.get("Age", 0))
+    except ValueError:
+        age = 0
+    return max(0, int(m.group(1)) - age)
+
+
+class KeysUnavailable(Exception):
+    """No signing keys could be loaded from the source."""
+
+
+class GoogleKeySet:
+    """
+    source: JWKS URL, file path or file:// URL.
+    Keys are refreshed in the background `refresh_ahead` seconds (at most
+    half the max-age) before it runs out; a failed refresh keeps the old keys and retries after
+    `retry_interval`. A token signed by an unknown kid (fresh rotation)
+    triggers one synchronous refetch, at most every `min_refetch` seconds.
+    """
+
+    def __init__(self, source=GOOGLE_CERTS_URL, default_ttl=3600, file_ttl=5,
+                 refresh_ahead=300, retry_interval=30, min_refetch=10, timeout=5):
+        self.source = source
+        self.default_ttl = default_ttl
+        self.file_ttl = file_ttl
+        self.refresh_ahead = refresh_ahead
+        self.retry_interval = retry_interval
+        self.min_refetch = min_refetch
+        self.timeout = timeout
+
+        self._keys = {}
+        self._ttl = 0
+        self._expires = 0.0
+        self._fetched_at = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+        self._fetches = 0
+        self._errors = 0
+        self._last_error = None
+        self._unknown_kid = 0
+
+    @property
+    def _path(self):
+        if self.source.startswith("file://"):
+            return self.source[len("file://"):]
+        if not self.source.startswith(("http://", "https://")):
+            return self.source
+        return None
+
+    def _fetch(self):
+        """(jwks dict, ttl seconds) from the source."""
+        path = self._path
+        if path is not None:
+            with open(path) as f:
+                return json.load(f), self.file_ttl
+        resp = requests.get(self.source, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json(), cache_ttl(resp.headers, self.default_ttl)
+
+    def refresh(self):
+        """Refetch the keys now; raises KeysUnavailable if that fails."""
+        with self._lock:
+            try:
+                jwks, ttl = self._fetch()
+                keys = {}
+                for jwk in jwks.get("keys", []):
+                    if jwk.get("kid"):
+                        keys[jwk["kid"]] = jwt.PyJWK(jwk).key
+                if not keys:
+                    raise ValueError("no usable keys")
+            except Exception as e:
+                self._errors += 1
+                self._last_error = str(e)
+                raise KeysUnavailable(f"{self.source}: {e}") from e
+            self._keys = keys
+            self._ttl = ttl
+            self._fetched_at = time.monotonic()
+            self._expires = self._fetched_at + ttl
+            self._fetches += 1
+            return ttl
+
+    def _ensure_worker(self):
+        # threads don't survive fork: (re)start lazily in whichever process verifies
+        if self._path is not None:
+            return
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="google-keys", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            ahead = min(self.refresh_ahead, self._ttl / 2)
+            time.sleep(max(self._expires - ahead - time.monotonic(), self.min_refetch))
+            try:
+                self.refresh()
+            except KeysUnavailable as e:
+                print("google key refresh failed, retrying in", self.retry_interval, "s:", e)
+                time.sleep(self.retry_interval)
+
+    def get_key(self, kid):
+        """Public key for a kid, loading or refetching the set when needed; None if unknown."""
+        if not self._keys or time.monotonic() >= self._expires:
+            try:
+                self.refresh()
+            except KeysUnavailable:
+                if not self._keys:
+                    raise
+                # serve the stale keys while the source is down
+        self._ensure_worker()
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() - self._fetched_at >= self.min_refetch:
+            self._unknown_kid += 1
+            self.refresh()
+            key = self._keys.get(kid)
+        return key
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "source": self.source,
+            "keys": len(self._keys),
+            "expires_in": round(self._expires - now, 1) if self._fetched_at is not None else None,
+            "fetches": self._fetches,
+            "unknown_kid_refetches": self._unknown_kid,
+            "errors": self._errors,
+            "last_error": self._last_error,
+        }
+
+
+def verify_id_token(token, keys, audience, leeway=10):
+    """
+    Claims of a Google ID token after checking signature, expiry, audience
+    and issuer. Raises jwt.PyJWTError if the token is invalid and
+    KeysUnavailable if the signing keys can't be loaded.
+    """
+    header = jwt.get_unverified_header(token)
+    key = keys.get_key(header.get("kid"))
+    if key is None:
+        raise jwt.InvalidTokenError("unknown signing key")
+    return jwt.decode(
+        token,
+        key,
+        algorithms=["RS256"],
+        audience=audience,
+        issuer=GOOGLE_ISSUERS,
+        leeway=leeway,
+    )
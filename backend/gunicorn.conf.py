@@ -0,0 +1,19 @@
+# gunicorn.conf.py
+#
+# Picked up automatically when gunicorn is started from backend/:
+#   gunicorn app:app
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+# threads > 1 lets concurrent /predict-career calls in one worker share a
+# microbatch (gthread worker; app.py turns PREDICT_BATCHING on to match);
+# 1 keeps the plain sync worker, which predicts inline
+threads = int(os.getenv("GUNICORN_THREADS", 1))
+
+# Load the recommender dataset once in the master, before workers fork.
+# Its arrays are read-only memory maps of the snapshot files, so every
+# worker shares the same pages and adding a worker costs almost no RSS.
+# (The whole app is not preloaded: MongoClient must be created after fork.)
+import model  # noqa: E402,F401
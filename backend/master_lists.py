@@ -0,0 +1,127 @@
+# master_lists.py
+#
+# Process-level cache of the /api/get-* master lists.
+# Each list is read from MongoDB once, serialized once and served with a
+# strong ETag (sha256 of the exact body) until either
+#   - the write path bumps the collection's version (new names upserted), or
+#   - `ttl` seconds pass (writes from other workers or seed scripts).
+# Because the ETag is a content hash, every worker hands out the same tag
+# for the same list and a browser/CDN revalidation gets a 304 from any of them.
+#
+# combined() serves all lists in one gzip-able body, and delta() only the
+# names added after a given version. The version is the `v` stamped on
+# each master document when the write path inserts it (a MongoDB counter,
+# so it is shared by every worker; seeded names have none and count as 0).
+# Stamps are taken before the write commits, so with several workers a
+# batch stamped N can become visible after one stamped N+1; delta() also
+# resends the last `overlap` versions so such late batches still arrive.
+
+import gzip
+import json
+import time
+import hashlib
+import threading
+from collections import namedtuple
+
+CachedList = namedtuple("CachedList", "names added body etag version loaded_at")
+CombinedLists = namedtuple("CombinedLists", "body gzip_body etag version")
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class MasterListCache:
+    """
+    collections: the master_* pymongo collections.
+    skip_blank: collection names whose blank names are dropped (as get-skills did).
+    """
+
+    def __init__(self, collections, limit=500, ttl=300, skip_blank=()):
+        self.collections = {c.name: c for c in collections}
+        self.limit = limit
+        self.ttl = ttl
+        self.skip_blank = set(skip_blank)
+        self._versions = {name: 0 for name in self.collections}
+        self._entries = {}
+        self._combined = None
+        self._lock = threading.Lock()
+
+    def version(self, coll):
+        return self._versions[coll if isinstance(coll, str) else coll.name]
+
+    def bump(self, coll):
+        """Mark a list stale; the next get() reloads it."""
+        name = coll if isinstance(coll, str) else coll.name
+        with self._lock:
+            self._versions[name] += 1
+            return self._versions[name]
+
+    def _load(self, name, version):
+        docs = self.collections[name].find({}, {"_id": 0, "name": 1, "v": 1}).sort("name", 1).limit(self.limit)
+        docs = [d for d in docs if isinstance(d.get("name"), str)]
+        if name in self.skip_blank:
+            docs = [d for d in docs if d["name"].strip()]
+        names = [d["name"] for d in docs]
+        added = [d.get("v") if isinstance(d.get("v"), int) else 0 for d in docs]
+        body = _dumps(names)
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        return CachedList(names, added, body, etag, version, time.monotonic())
+
+    def get(self, coll):
+        """Current CachedList for a collection, reloading it if stale."""
+        name = coll if isinstance(coll, str) else coll.name
+        entry = self._entries.get(name)
+        if self._fresh(name, entry):
+            return entry
+        with self._lock:
+            entry = self._entries.get(name)
+            if not self._fresh(name, entry):
+                entry = self._load(name, self._versions[name])
+                self._entries[name] = entry
+        return entry
+
+    def _fresh(self, name, entry):
+        return (
+            entry is not None
+            and entry.version == self._versions[name]
+            and time.monotonic() - entry.loaded_at < self.ttl
+        )
+
+    def combined(self, labels):
+        """
+        {"version": v, "since": null, "lists": {label: names}} for
+        labels = {collection name: label}, serialized and gzipped once per change.
+        """
+        entries = {name: self.get(name) for name in labels}
+        key = tuple((name, e.etag) for name, e in entries.items())
+        combined = self._combined
+        if combined is not None and combined[0] == key:
+            return combined[1]
+        version = max((max(e.added, default=0) for e in entries.values()), default=0)
+        body = _dumps({
+            "version": version,
+            "since": None,
+            "lists": {labels[name]: e.names for name, e in entries.items()},
+        })
+        etag = hashlib.sha256(b"".join(e.etag.encode() for e in entries.values())).hexdigest()[:32]
+        result = CombinedLists(body, gzip.compress(body, 6), etag, version)
+        self._combined = (key, result)
+        return result
+
+    def delta(self, labels, since, overlap=0):
+        """
+        Like combined(), but only names stamped with a version above
+        `since - overlap` (clients merge, so repeats are harmless).
+        """
+        floor = max(since - overlap, 0)  # seeded names (0) are never late
+        entries = {name: self.get(name) for name in labels}
+        version = max((max(e.added, default=0) for e in entries.values()), default=0)
+        return _dumps({
+            "version": version,
+            "since": since,
+            "lists": {
+                labels[name]: [n for n, v in zip(e.names, e.added) if v > floor]
+                for name, e in entries.items()
+            },
+        })
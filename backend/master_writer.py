@@ -0,0 +1,140 @@
+# master_writer.py
+#
+# Background, coalescing writer for master-list auto-growth.
+# Save requests enqueue the names they saw and return immediately; a worker
+# thread drops names already known to exist, and every `flush_interval`
+# seconds (or as soon as `max_items` are pending) hands each collection's
+# new names to `write_fn` in one call, i.e. one bulk_write per collection.
+
+import os
+import time
+import atexit
+import threading
+
+
+class MasterListWriter:
+    """
+    write_fn(coll_name, names) persists a batch of new names; it runs on the
+    worker thread. Names are only marked known after a successful write, so a
+    failed batch is retried the next time any request mentions them.
+    """
+
+    def __init__(self, write_fn, max_items=500, flush_interval=0.2, name="master-writer"):
+        self.write_fn = write_fn
+        self.max_items = max(1, int(max_items))
+        self.flush_interval = max(0.0, float(flush_interval))
+        self.name = name
+
+        self._known = {}
+        self._pending = {}
+        self._n_pending = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self._atexit = False
+
+        self._enqueued = 0
+        self._skipped = 0
+        self._written = 0
+        self._batches = 0
+        self._errors = 0
+        self._last_error = None
+
+    def mark_known(self, coll_name, names):
+        """Record names that already exist (e.g. loaded at startup)."""
+        with self._cond:
+            self._known.setdefault(coll_name, set()).update(n for n in names if isinstance(n, str))
+
+    def enqueue(self, coll_name, names):
+        """Queue names for coll_name; known and duplicate names cost nothing."""
+        added = 0
+        with self._cond:
+            known = self._known.setdefault(coll_name, set())
+            pending = self._pending.setdefault(coll_name, set())
+            for n in names or []:
+                if not isinstance(n, str) or n in known or n in pending:
+                    self._skipped += 1
+                    continue
+                pending.add(n)
+                added += 1
+            if not added:
+                return 0
+            self._enqueued += added
+            self._n_pending += added
+            self._cond.notify()
+        self._ensure_worker()
+        return added
+
+    def _ensure_worker(self):
+        # threads don't survive fork: (re)start lazily in whichever process enqueues
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+                if not self._atexit:
+                    atexit.register(self.flush)
+                    self._atexit = True
+
+    def _take(self):
+        """Wait for pending names, then until the batch fills or the interval passes."""
+        with self._cond:
+            while not self._n_pending:
+                self._cond.wait()
+            deadline = time.monotonic() + self.flush_interval
+            while self._n_pending < self.max_items:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self._swap()
+
+    def _swap(self):
+        batch = {coll: names for coll, names in self._pending.items() if names}
+        self._pending = {}
+        self._n_pending = 0
+        return batch
+
+    def _write(self, batch):
+        for coll_name, names in batch.items():
+            names = sorted(names)
+            try:
+                self.write_fn(coll_name, names)
+            except Exception as e:
+                with self._cond:
+                    self._errors += 1
+                    self._last_error = f"{coll_name}: {e}"
+                print(f"{self.name}: writing {len(names)} names to {coll_name} failed:", e)
+                continue
+            with self._cond:
+                self._known.setdefault(coll_name, set()).update(names)
+                self._written += len(names)
+                self._batches += 1
+
+    def _run(self):
+        while True:
+            self._write(self._take())
+
+    def flush(self):
+        """Write everything pending now, on the calling thread."""
+        with self._cond:
+            batch = self._swap()
+        if batch:
+            self._write(batch)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_items": self.max_items,
+                "flush_interval_ms": self.flush_interval * 1000,
+                "enqueued": self._enqueued,
+                "skipped_known": self._skipped,
+                "written": self._written,
+                "batches": self._batches,
+                "errors": self._errors,
+                "last_error": self._last_error,
+                "pending": self._n_pending,
+                "known": {coll: len(names) for coll, names in self._known.items()},
+            }
@@ -0,0 +1,167 @@
+# microbatch.py
+#
+# In-process microbatcher: concurrent callers submit single items, a
+# background thread collects them for up to `max_wait` seconds or
+# `max_batch` items, runs one vectorized call and resolves every caller's
+# Future with its own result. It only waits while other submits are in
+# flight, so a lone caller is run at once instead of paying the window. If the batched call fails, the items are
+# retried one by one, so a bad item only fails its own caller.
+
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    batch_fn: list of items -> list (or array) of results, same order and length.
+    Items are only ever processed in submission order.
+    """
+
+    def __init__(self, batch_fn, max_batch=64, max_wait=0.002, name="microbatch"):
+        self.batch_fn = batch_fn
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait))
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        # submit() calls whose item isn't in a collected batch yet
+        self._incoming = 0
+
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._errors = 0
+        self._split = 0
+        self._max_batch_seen = 0
+        self._delay_total = 0.0
+        self._delay_max = 0.0
+        self._size_hist = {}
+
+    def _ensure_worker(self):
+        # threads don't survive fork: (re)start lazily in whichever process submits
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()
+                    self._incoming = 0
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def submit(self, item) -> Future:
+        """Queue one item; the Future resolves to its result."""
+        self._ensure_worker()
+        with self._lock:
+            self._incoming += 1
+        fut = Future()
+        self._queue.put((item, fut, time.perf_counter()))
+        return fut
+
+    def __call__(self, item, timeout=None):
+        """Blocking submit."""
+        return self.submit(item).result(timeout)
+
+    def _collect(self):
+        """
+        Block for the first item, then gather more until full or max_wait
+        passes; stop early once no other submit is in flight.
+        """
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            with self._lock:
+                expecting = self._incoming > len(batch)
+            remaining = deadline - time.perf_counter()
+            if not expecting or remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        with self._lock:
+            self._incoming -= len(batch)
+        return batch
+
+    def _call(self, items):
+        results = self.batch_fn(items)
+        if len(results) != len(items):
+            raise RuntimeError(f"{self.name}: batch_fn returned {len(results)} results for {len(items)} items")
+        return results
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            items = [item for item, _, _ in batch]
+            try:
+                outcomes = [(r, None) for r in self._call(items)]
+                split = False
+            except Exception as e:
+                if len(items) == 1:
+                    outcomes = [(None, e)]
+                    split = False
+                else:
+                    # find the bad item(s): everyone else still gets a result
+                    outcomes = []
+                    for item in items:
+                        try:
+                            outcomes.append((self._call([item])[0], None))
+                        except Exception as e:
+                            outcomes.append((None, e))
+                    split = True
+
+            for (_, fut, _), (result, error) in zip(batch, outcomes):
+                if error is not None:
+                    fut.set_exception(error)
+                else:
+                    fut.set_result(result)
+
+            failed = sum(error is not None for _, error in outcomes)
+            self._record(len(batch), [started - enqueued for _, _, enqueued in batch], failed, split)
+
+    def _record(self, size, delays, failed, split):
+        bucket = 1
+        while bucket < size:
+            bucket *= 2
+        with self._stats_lock:
+            self._batches += 1
+            self._items += size
+            self._errors += failed
+            self._split += int(split)
+            self._max_batch_seen = max(self._max_batch_seen, size)
+            self._delay_total += sum(delays)
+            self._delay_max = max(self._delay_max, max(delays))
+            self._size_hist[bucket] = self._size_hist.get(bucket, 0) + 1
+
+    def stats(self):
+        """Batch size and queue delay (enqueue -> batch start) counters."""
+        with self._stats_lock:
+            return {
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": self._batches,
+                "items": self._items,
+                # items whose call failed; batches retried item by item
+                "errors": self._errors,
+                "split_batches": self._split,
+                "queued": self._queue.qsize(),
+                "mean_batch_size": self._items / self._batches if self._batches else 0.0,
+                "max_batch_size": self._max_batch_seen,
+                # keys are upper bounds: {"1": n, "2": n, "4": n, ...}
+                "batch_size_histogram": {str(k): v for k, v in sorted(self._size_hist.items())},
+                "mean_queue_delay_ms": self._delay_total / self._items * 1000 if self._items else 0.0,
+                "max_queue_delay_ms": self._delay_max * 1000,
+            }
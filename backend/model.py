@@ -2,6 +2,12 @@ import os
 import pandas as pd
 import numpy as np
 import json
+import hashlib
+from scipy import sparse
+
+import snapshot
+from vocab import Vocabulary, clean_label, scalar_key
+from result_cache import ResultCache
 
 # -------------------------------------------
 # CONFIG
@@ -9,6 +15,11 @@ import json
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_PATH = os.path.join(BASE_DIR, "ml_data", "final_dataset.csv")
+# compiled binary snapshot of DATA_PATH (see snapshot.py); rebuilt automatically
+SNAPSHOT_ROOT = os.getenv(
+    "DATASET_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "dataset_snapshot"),
+)
 
 LIST_COLS = [
     "skills",
@@ -41,6 +52,11 @@ WEIGHTS = {
     "scalar_salary": 0.02,
 }
 
+# profiles scored per pass in recommend_batch(); bounds the (chunk x rows) matrices
+BATCH_CHUNK_SIZE = int(os.getenv("RECOMMEND_BATCH_CHUNK", 128))
+# recommend()/recommend_batch() results kept per profile fingerprint (0 disables)
+RESULT_CACHE_SIZE = int(os.getenv("RECOMMEND_CACHE_SIZE", 4096))
+
 # -------------------------------------------
 # HELPERS
 # -------------------------------------------
@@ -107,16 +123,241 @@ def scalar_similarity(user_value, row_value):
         return 0.0
     return 1.0 if str(user_value).strip().lower() == str(row_value).strip().lower() else 0.0
 
+# -------------------------------------------
+# COMPILE DATASET
+# -------------------------------------------
+
+def _build_list_index(rows):
+    """
+    Turn a column of row lists into (vocab, indptr, indices) CSR arrays.
+    Row i is the 0/1 indicator of to_set(rows[i]) over the vocab IDs,
+    so `matrix @ user_indicator` is the per-row intersection size.
+    """
+    vocab = Vocabulary()
+    indptr = [0]
+    indices = []
+    for lst in rows:
+        ids = {vocab.add(item) for item in lst}
+        ids.discard(None)
+        indices.extend(sorted(ids))
+        indptr.append(len(indices))
+    return vocab, np.asarray(indptr, dtype=np.int32), np.asarray(indices, dtype=np.int32)
+
+def _build_ordered_index(rows, limit):
+    """Like _build_list_index() but keeps the first `limit` raw items in order."""
+    vocab = {}
+    indptr = [0]
+    indices = []
+    for lst in rows:
+        indices.extend(vocab.setdefault(str(item), len(vocab)) for item in lst[:limit])
+        indptr.append(len(indices))
+    return vocab, np.asarray(indptr, dtype=np.int32), np.asarray(indices, dtype=np.int32)
+
+def _build_scalar_codes(values):
+    """Int-code a scalar column by scalar_key(); -1 marks missing values."""
+    vocab = Vocabulary(key=scalar_key)
+    codes = np.full(len(values), -1, dtype=np.int32)
+    for i, v in enumerate(values):
+        code = vocab.add(v)
+        if code is not None:
+            codes[i] = code
+    return vocab, codes
+
+def compile_dataset(csv_path: str = DATA_PATH):
+    """
+    Parse the CSV once into the scoring engine's arrays and vocab tables.
+    Returns (arrays, meta) in the layout stored by snapshot.save().
+    """
+    profiles = pd.read_csv(csv_path)
+    n_rows = len(profiles)
+
+    for col in LIST_COLS:
+        if col in profiles.columns:
+            profiles[col] = profiles[col].apply(parse_list)
+
+    arrays = {}
+    meta = {"n_rows": n_rows, "list_vocab": {}, "scalar_vocab": {}}
+
+    for col in LIST_COLS:
+        rows = profiles[col].tolist() if col in profiles.columns else [[]] * n_rows
+        vocab, indptr, indices = _build_list_index(rows)
+        meta["list_vocab"][col] = vocab.names
+        arrays[f"{col}.indptr"] = indptr
+        arrays[f"{col}.indices"] = indices
+        arrays[f"{col}.data"] = np.ones(len(indices), dtype=np.float64)
+
+    for col in SCALAR_COLS:
+        values = profiles[col].tolist() if col in profiles.columns else [None] * n_rows
+        vocab, codes = _build_scalar_codes(values)
+        meta["scalar_vocab"][col] = vocab.names
+        arrays[f"{col}.codes"] = codes
+
+    # career grouping: codes follow first appearance in the dataset (the old
+    # dict-insertion order, used to break score ties), rows are stably sorted
+    # by code so each career is one contiguous segment of career.order
+    codes, names = pd.factorize(
+        profiles["target_recommended_career"], sort=False, use_na_sentinel=False
+    )
+    order = np.argsort(codes, kind="stable")
+    arrays["career.codes"] = codes.astype(np.int32)
+    arrays["career.order"] = order.astype(np.int32)
+    arrays["career.offsets"] = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0]).astype(np.int32)
+    meta["career_names"] = list(names)
+
+    # first five raw skills per row: the top_skills fallback
+    rows = profiles["skills"].tolist() if "skills" in profiles.columns else [[]] * n_rows
+    vocab, indptr, indices = _build_ordered_index(rows, 5)
+    meta["fallback_skill_vocab"] = list(vocab)
+    arrays["fallback_skills.indptr"] = indptr
+    arrays["fallback_skills.indices"] = indices
+
+    return arrays, meta
+
+def load_dataset(csv_path: str = DATA_PATH, snapshot_root: str = SNAPSHOT_ROOT):
+    """
+    Load the compiled dataset from its binary snapshot (memory-mapped),
+    rebuilding the snapshot first if the CSV checksum or format changed.
+    """
+    checksum = snapshot.file_checksum(csv_path)
+    loaded = snapshot.load(snapshot_root, checksum)
+    if loaded is not None:
+        return loaded
+
+    arrays, meta = compile_dataset(csv_path)
+    try:
+        os.makedirs(snapshot_root, exist_ok=True)
+        # replace: a snapshot that exists but didn't load is corrupt
+        snapshot.save(snapshot_root, checksum, arrays, meta, replace=True)
+    except OSError as e:
+        # read-only deploy: keep serving from the in-memory arrays
+        print("dataset snapshot not written:", e)
+        return arrays, dict(meta, checksum=checksum)
+    # the snapshot can still fail to load back (e.g. replaced concurrently):
+    # same fallback as a failed write
+    return snapshot.load(snapshot_root, checksum) or (arrays, dict(meta, checksum=checksum))
+
 # -------------------------------------------
 # LOAD DATASET
 # -------------------------------------------
 
-profiles = pd.read_csv(DATA_PATH)
-print("Loaded profiles:", len(profiles))
+_arrays, _meta = load_dataset()
+N_ROWS = _meta["n_rows"]
+DATASET_CHECKSUM = _meta["checksum"]
+print("Loaded profiles:", N_ROWS)
 
+# one interned vocabulary per field; dataset rows use IDs 0..width-1 and
+# names added later (master lists, see app.py) get IDs past the matrix width
+LIST_VOCAB = {}
+LIST_MATRIX = {}
 for col in LIST_COLS:
-    if col in profiles.columns:
-        profiles[col] = profiles[col].apply(parse_list)
+    LIST_VOCAB[col] = Vocabulary(_meta["list_vocab"][col])
+    LIST_MATRIX[col] = sparse.csr_matrix(
+        (_arrays[f"{col}.data"], _arrays[f"{col}.indices"], _arrays[f"{col}.indptr"]),
+        shape=(N_ROWS, len(LIST_VOCAB[col])),
+        copy=False,
+    )
+
+SCALAR_VOCAB = {}
+SCALAR_CODES = {}
+for col in SCALAR_COLS:
+    SCALAR_VOCAB[col] = Vocabulary(_meta["scalar_vocab"][col], key=scalar_key)
+    SCALAR_CODES[col] = _arrays[f"{col}.codes"]
+
+CAREER_NAMES = _meta["career_names"]
+CAREER_CODES = _arrays["career.codes"]
+CAREER_ORDER = _arrays["career.order"]
+CAREER_OFFSETS = _arrays["career.offsets"]
+
+SKILL_NAMES = LIST_VOCAB["skills"].names
+FALLBACK_SKILL_NAMES = _meta["fallback_skill_vocab"]
+FALLBACK_SKILLS = sparse.csr_matrix(
+    (np.ones(len(_arrays["fallback_skills.indices"])),
+     _arrays["fallback_skills.indices"], _arrays["fallback_skills.indptr"]),
+    shape=(N_ROWS, len(FALLBACK_SKILL_NAMES)),
+)
+
+def _fallback_skills(idx):
+    """First five skills of dataset row idx, in their original order."""
+    ptr = FALLBACK_SKILLS.indptr
+    return [FALLBACK_SKILL_NAMES[j] for j in FALLBACK_SKILLS.indices[ptr[idx]:ptr[idx + 1]]]
+
+def label_counts(col):
+    """Number of dataset rows listing each label of a list column."""
+    counts = np.diff(LIST_MATRIX[col].tocsc().indptr)
+    names = LIST_VOCAB[col].names
+    return {names[j]: int(c) for j, c in enumerate(counts) if c}
+
+def _list_overlap(col, user_lists):
+    """Vectorized list_similarity() for N users x every row -> (N, N_ROWS)."""
+    vocab = LIST_VOCAB[col]
+    width = LIST_MATRIX[col].shape[1]
+    user_vecs = np.zeros((len(user_lists), width))
+    denom = np.ones(len(user_lists))
+    for n, user_list in enumerate(user_lists):
+        ids, count = vocab.encode(user_list)
+        # empty selections stay all-zero, matching list_similarity() -> 0.0
+        denom[n] = max(count, 1)
+        user_vecs[n, ids[ids < width]] = 1.0
+    inter = (LIST_MATRIX[col] @ user_vecs.T).T
+    return inter / denom[:, None]
+
+def _scalar_match(col, user_values):
+    """Vectorized scalar_similarity() for N users x every row -> (N, N_ROWS)."""
+    vocab = SCALAR_VOCAB[col]
+    codes = np.full(len(user_values), -2, dtype=np.int32)
+    for n, value in enumerate(user_values):
+        code = vocab.get(value)
+        if code is not None:
+            codes[n] = code
+    # -2 never matches, -1 marks missing row values
+    return (SCALAR_CODES[col][None, :] == codes[:, None]).astype(np.float64)
+
+def score_matrix(users: list) -> np.ndarray:
+    """
+    Score N normalized user profiles against every dataset row -> (N, N_ROWS).
+    Same terms and summation order as the original per-row loop,
+    so the floats (and therefore the ranking) are identical.
+    """
+    def lists(key):
+        return [u.get(key, []) for u in users]
+
+    def values(key):
+        return [u.get(key) for u in users]
+
+    s_skills   = _list_overlap("skills", lists("skills"))
+    s_intr     = _list_overlap("interests", lists("interests"))
+    s_str      = _list_overlap("strengths", lists("strengths"))
+    s_weak_pen = -_list_overlap("weaknesses", lists("weaknesses"))
+    s_lf       = _list_overlap("learning_formats", lists("learning_formats"))
+    s_work_env = _list_overlap("preferred_work_environment", lists("preferred_work_environment"))
+
+    s_p_type   = _scalar_match("personality_work_type", values("personality_work_type"))
+    s_p_style  = _scalar_match("personality_work_style", values("personality_work_style"))
+    s_p_env    = _scalar_match("personality_env_pref", values("personality_env_pref"))
+    s_p_stress = _scalar_match("personality_stress_handling", values("personality_stress_handling"))
+    s_person   = (s_p_type + s_p_style + s_p_env + s_p_stress) / 4.0
+
+    s_lp   = _scalar_match("learning_pace", values("learning_pace"))
+    s_mode = _scalar_match("mode_preference", values("mode_preference"))
+    s_learn_mode = (s_lp + s_mode) / 2.0
+
+    s_salary = _scalar_match("salary_expectation", values("salary_expectation"))
+
+    score = np.zeros((len(users), N_ROWS))
+    score += WEIGHTS["skills"]                     * s_skills
+    score += WEIGHTS["interests"]                  * s_intr
+    score += WEIGHTS["strengths"]                  * s_str
+    score += WEIGHTS["weaknesses"]                 * s_weak_pen
+    score += WEIGHTS["learning_formats"]           * s_lf
+    score += WEIGHTS["preferred_work_environment"] * s_work_env
+    score += WEIGHTS["scalar_personality"]         * s_person
+    score += WEIGHTS["scalar_learning_mode"]       * s_learn_mode
+    score += WEIGHTS["scalar_salary"]              * s_salary
+    return score
+
+def score_rows(user: dict) -> np.ndarray:
+    """Score one normalized user profile against every dataset row."""
+    return score_matrix([user])[0]
 
 # -------------------------------------------
 # NORMALIZE USER PROFILE
@@ -212,116 +453,152 @@ def normalize_user_profile(profile: dict) -> dict:
 
     return norm
 
-# RECOMMENDER
+# CAREER AGGREGATION
 
-def recommend(user_profile: dict, top_k: int = 3):
+def best_per_career(scores: np.ndarray):
     """
-    user_profile: dict from frontend (/api/get-fullinfo -> profile)
-    returns: list of {career, score, top_skills}
+    Segmented max over the career groups, along the last axis.
+    Returns (best score per career code, row index of the first row hitting it);
+    works for one score vector or an (N, N_ROWS) batch.
     """
+    sorted_scores = scores[..., CAREER_ORDER]
+    n = sorted_scores.shape[-1]
+    best = np.maximum.reduceat(sorted_scores, CAREER_OFFSETS, axis=-1)
+    counts = np.diff(np.r_[CAREER_OFFSETS, n])
+    pos = np.where(sorted_scores == np.repeat(best, counts, axis=-1), np.arange(n), n)
+    first = np.minimum.reduceat(pos, CAREER_OFFSETS, axis=-1)
+    return best, CAREER_ORDER[first]
+
+def top_k_careers(career_best: np.ndarray, top_k: int) -> np.ndarray:
+    """Career codes of the top_k scores, desc, ties broken by dataset order."""
+    n = len(career_best)
+    k = min(max(top_k, 0), n)
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        cand = np.argpartition(-career_best, k - 1)[:k]
+        # keep every career tied with the k-th score so tie-breaking is exact
+        cand = np.flatnonzero(career_best >= career_best[cand].min())
+    else:
+        cand = np.arange(n)
+    cand = cand[np.lexsort((cand, -career_best[cand]))]
+    return cand[:k]
 
-    user = normalize_user_profile(user_profile)
+# RECOMMENDER
 
-    user_skills   = user.get("skills", [])
-    user_intr     = user.get("interests", [])
-    user_str      = user.get("strengths", [])
-    user_weak     = user.get("weaknesses", [])
-    user_lf       = user.get("learning_formats", [])
-    user_work_env = user.get("preferred_work_environment", [])
-
-    # compute score PER ROW first, as a plain Python list
-    scores = []
-
-    for _, row in profiles.iterrows():
-        row_skills    = row["skills"]
-        row_intr      = row["interests"]
-        row_str       = row["strengths"]
-        row_weak      = row["weaknesses"]
-        row_lf        = parse_list(row.get("learning_formats", []))
-        row_work_env  = parse_list(row.get("preferred_work_environment", []))
-
-        # list similarities
-        s_skills    = list_similarity(user_skills, row_skills)
-        s_intr      = list_similarity(user_intr, row_intr)
-        s_str       = list_similarity(user_str, row_str)
-        s_weak_pen  = list_penalty(user_weak, row_weak)
-        s_lf        = list_similarity(user_lf, row_lf)
-        s_work_env  = list_similarity(user_work_env, row_work_env)
-
-        # scalar personality
-        s_p_type   = scalar_similarity(user.get("personality_work_type"), row.get("personality_work_type"))
-        s_p_style  = scalar_similarity(user.get("personality_work_style"), row.get("personality_work_style"))
-        s_p_env    = scalar_similarity(user.get("personality_env_pref"), row.get("personality_env_pref"))
-        s_p_stress = scalar_similarity(user.get("personality_stress_handling"), row.get("personality_stress_handling"))
-        s_person   = (s_p_type + s_p_style + s_p_env + s_p_stress) / 4.0
-
-        # scalar learning + mode
-        s_lp   = scalar_similarity(user.get("learning_pace"), row.get("learning_pace"))
-        s_mode = scalar_similarity(user.get("mode_preference"), row.get("mode_preference"))
-        s_learn_mode = (s_lp + s_mode) / 2.0
-
-        # salary
-        s_salary = scalar_similarity(user.get("salary_expectation"), row.get("salary_expectation"))
-
-        # final weighted score
-        score = 0.0
-        score += WEIGHTS["skills"]                     * s_skills
-        score += WEIGHTS["interests"]                  * s_intr
-        score += WEIGHTS["strengths"]                  * s_str
-        score += WEIGHTS["weaknesses"]                 * s_weak_pen
-        score += WEIGHTS["learning_formats"]           * s_lf
-        score += WEIGHTS["preferred_work_environment"] * s_work_env
-        score += WEIGHTS["scalar_personality"]         * s_person
-        score += WEIGHTS["scalar_learning_mode"]       * s_learn_mode
-        score += WEIGHTS["scalar_salary"]              * s_salary
-
-        scores.append(score)
-
-    # convert once AFTER loop
-    scores = np.array(scores, dtype=float)
-
-    if len(scores) == 0:
+def _format_results(user: dict, career_best: np.ndarray, career_idx: np.ndarray, top_k: int):
+    """Top-k careers of one user -> list of {career, score, top_skills}."""
+    order = top_k_careers(career_best, top_k)
+    if len(order) == 0:
         return []
 
-    # -------- aggregate by career (unique careers) --------
-    career_to_best = {}
-    career_to_idx = {}
-
-    # IMPORTANT: iterate using positional index so it lines up with scores
-    for idx in range(len(profiles)):
-        career = profiles.iloc[idx]["target_recommended_career"]
-        score = scores[idx]
-        if (career not in career_to_best) or (score > career_to_best[career]):
-            career_to_best[career] = score
-            career_to_idx[career] = idx
-
-    # list of (career, score, idx), sorted by score desc
-    items = [
-        (career, career_to_best[career], career_to_idx[career])
-        for career in career_to_best
-    ]
-    items.sort(key=lambda x: x[1], reverse=True)
-
-    # take top_k unique careers
-    items = items[:top_k]
-
     # normalize scores w.r.t best one so UI gets 0–1 range
-    max_score = max((s for _, s, _ in items), default=1.0)
+    max_score = career_best[order].max()
     if max_score == 0:
         max_score = 1.0
 
+    user_skill_ids, _ = LIST_VOCAB["skills"].encode(user.get("skills", []))
+    user_skill_ids = set(user_skill_ids.tolist())
+    skill_matrix = LIST_MATRIX["skills"]
+
     results = []
-    for rank, (career, raw_score, idx) in enumerate(items, start=1):
-        row = profiles.iloc[idx]
-        row_skills = row["skills"]
-        matched_skills = list(to_set(user_skills) & to_set(row_skills))
+    for code in order:
+        idx = career_idx[code]
+        row_ids = skill_matrix.indices[skill_matrix.indptr[idx]:skill_matrix.indptr[idx + 1]]
+        matched_skills = [SKILL_NAMES[j] for j in row_ids if j in user_skill_ids]
         if not matched_skills:
-            matched_skills = row_skills[:5]
+            matched_skills = _fallback_skills(idx)
 
         results.append({
-            "career": career,
-            "score": float(round(raw_score / max_score, 4)),
+            "career": CAREER_NAMES[code],
+            "score": float(round(career_best[code] / max_score, 4)),
             "top_skills": matched_skills
         })
 
-    return results
\ No newline at end of file
+    return results
+
+# RESULT CACHE
+
+RESULT_CACHE = ResultCache(RESULT_CACHE_SIZE)
+
+def model_version() -> str:
+    """Dataset checksum + WEIGHTS; cached results are only valid for one version."""
+    weights = json.dumps(WEIGHTS, sort_keys=True)
+    return DATASET_CHECKSUM[:16] + "-" + hashlib.blake2b(weights.encode(), digest_size=8).hexdigest()
+
+def profile_fingerprint(user: dict, top_k: int) -> bytes:
+    """
+    Stable hash of everything scoring reads from a normalized profile:
+    list columns as sorted label sets (to_set semantics), scalar columns
+    stripped + lower-cased. Profiles with equal fingerprints get equal results.
+    """
+    parts = [str(top_k)]
+    for col in LIST_COLS:
+        labels = {clean_label(v) for v in (user.get(col) or [])}
+        labels.discard(None)
+        parts.append(json.dumps(sorted(labels), ensure_ascii=False))
+    for col in SCALAR_COLS:
+        parts.append(json.dumps(scalar_key(user.get(col)), ensure_ascii=False))
+    return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=16).digest()
+
+def _copy_results(results):
+    # callers get their own lists/dicts; the cached ones stay untouched
+    return [dict(r, top_skills=list(r["top_skills"])) for r in results]
+
+def result_cache_stats() -> dict:
+    return RESULT_CACHE.stats()
+
+def recommend(user_profile: dict, top_k: int = 3):
+    """
+    user_profile: dict from frontend (/api/get-fullinfo -> profile)
+    returns: list of {career, score, top_skills}
+    """
+
+    user = normalize_user_profile(user_profile)
+
+    if N_ROWS == 0:
+        return []
+
+    version = model_version()
+    key = profile_fingerprint(user, top_k)
+    cached = RESULT_CACHE.get(version, key)
+    if cached is not None:
+        return _copy_results(cached)
+
+    # one sparse mat-vec per list column + int compares per scalar column
+    scores = score_rows(user)
+
+    # -------- aggregate by career (unique careers) --------
+    career_best, career_idx = best_per_career(scores)
+    results = _format_results(user, career_best, career_idx, top_k)
+    RESULT_CACHE.put(version, key, _copy_results(results))
+    return results
+
+def recommend_batch(user_profiles: list, top_k: int = 3, chunk_size: int = None):
+    """
+    Batch version of recommend(): one list of results per input profile.
+    Profiles are scored chunk_size at a time as a (chunk, N_ROWS) matrix
+    so peak memory stays bounded for large batches; chunk_size is capped
+    at BATCH_CHUNK_SIZE.
+    """
+    chunk_size = max(1, min(int(chunk_size or BATCH_CHUNK_SIZE), BATCH_CHUNK_SIZE))
+    users = [normalize_user_profile(p) for p in user_profiles]
+
+    if N_ROWS == 0:
+        return [[] for _ in users]
+
+    # only cache misses are scored
+    version = model_version()
+    keys = [profile_fingerprint(user, top_k) for user in users]
+    out = [RESULT_CACHE.get(version, key) for key in keys]
+    out = [_copy_results(r) if r is not None else None for r in out]
+    todo = [n for n, r in enumerate(out) if r is None]
+
+    for start in range(0, len(todo), chunk_size):
+        rows = todo[start:start + chunk_size]
+        chunk = [users[n] for n in rows]
+        career_best, career_idx = best_per_career(score_matrix(chunk))
+        for i, n in enumerate(rows):
+            out[n] = _format_results(users[n], career_best[i], career_idx[i], top_k)
+            RESULT_CACHE.put(version, keys[n], _copy_results(out[n]))
+    return out
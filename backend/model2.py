@@ -1,17 +1,67 @@
+import os
+import sys
 import json
+import time
+import shutil
+import hashlib
+import argparse
+from contextlib import contextmanager
+
+import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import LabelEncoder
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import classification_report, accuracy_score
 import joblib
 
 from xgboost import XGBClassifier  # pip install xgboost
 
+from snapshot import file_checksum
+
 
 # Paths
 DATA_PATH = "final_dataset.csv"              # adjust if needed
 MODEL_PATH = "career_recommender_xgb.joblib" # output model file
+CACHE_DIR = ".feature_cache"                 # fitted TF-IDF matrices, keyed by dataset hash
+
+TARGET_COL = "target_recommended_career"
+
+TFIDF_PARAMS = dict(max_features=5000, ngram_range=(1, 2), stop_words="english")
+HASHING_PARAMS = dict(n_features=2 ** 18, ngram_range=(1, 2), stop_words="english", alternate_sign=False)
+SPLIT_PARAMS = dict(test_size=0.2, random_state=42)
+
+
+# ----------------------------
+# Per-stage timings
+# ----------------------------
+TIMINGS = []
+
+
+@contextmanager
+def stage(name):
+  t0 = time.perf_counter()
+  yield
+  elapsed = time.perf_counter() - t0
+  TIMINGS.append((name, elapsed))
+  print(f"[TIME] {name}: {elapsed:.2f}s")
+
+
+def print_timings():
+  total = sum(t for _, t in TIMINGS)
+  print("\n[TIME] Stage summary:")
+  for name, t in TIMINGS:
+    print(f"  {name:<28} {t:8.2f}s")
+  print(f"  {'total':<28} {total:8.2f}s")
+
+
+def cache_key(data_hash, mode, params):
+  """Dataset hash + everything that changes the features -> cache entry name."""
+  blob = json.dumps({"mode": mode, "params": params}, sort_keys=True, default=str)
+  return f"{mode}-{data_hash[:16]}-{hashlib.sha256(blob.encode()).hexdigest()[:8]}"
 
 
 def parse_list_column(cell):
@@ -93,35 +143,74 @@ def build_profile_text(df: pd.DataFrame) -> pd.Series:
   return profile_text
 
 
-def main():
-  # ----------------------------
-  # 1. Load and prepare data
-  # ----------------------------
-  df = pd.read_csv(DATA_PATH)
-
-  if "target_recommended_career" not in df.columns:
-    raise ValueError("Column 'target_recommended_career' not found in dataset.")
+def load_or_build_tfidf(data_path, cache_dir, use_cache=True):
+  """
+  Split + fitted TF-IDF features for the in-memory pipeline.
+  Cached on disk per (dataset hash, TF-IDF/split params); a hit skips
+  CSV parsing, text building and vectorizer fitting entirely.
+  """
+  with stage("hash dataset"):
+    data_hash = file_checksum(data_path)
+  path = os.path.join(cache_dir, cache_key(data_hash, "tfidf", [TFIDF_PARAMS, SPLIT_PARAMS]))
+
+  if use_cache and os.path.exists(os.path.join(path, "done")):
+    with stage("load cached features"):
+      X_train = sparse.load_npz(os.path.join(path, "X_train.npz"))
+      X_test = sparse.load_npz(os.path.join(path, "X_test.npz"))
+      y_train = np.load(os.path.join(path, "y_train.npy"))
+      y_test = np.load(os.path.join(path, "y_test.npy"))
+      tfidf = joblib.load(os.path.join(path, "tfidf.joblib"))
+    print(f"[INFO] Feature cache hit: {path}")
+    return X_train, X_test, y_train, y_test, tfidf
+
+  with stage("read csv"):
+    df = pd.read_csv(data_path)
+  if TARGET_COL not in df.columns:
+    raise ValueError(f"Column '{TARGET_COL}' not found in dataset.")
 
   # Target labels
-  y = df["target_recommended_career"].astype(str)
-
-  # Build combined text feature
-  X_text = build_profile_text(df)
-
-  # ----------------------------------------
-  # 2. Train-test split for evaluation
-  # ----------------------------------------
-  X_train, X_test, y_train, y_test = train_test_split(
-    X_text,
-    y,
-    test_size=0.2,
-    random_state=42,
-    stratify=y,
+  y = df[TARGET_COL].astype(str).to_numpy()
+
+  with stage("build profile text"):
+    X_text = build_profile_text(df)
+
+  text_train, text_test, y_train, y_test = train_test_split(
+    X_text, y, stratify=y, **SPLIT_PARAMS
+  )
+
+  with stage("fit tf-idf"):
+    tfidf = TfidfVectorizer(**TFIDF_PARAMS)
+    X_train = tfidf.fit_transform(text_train)
+    X_test = tfidf.transform(text_test)
+
+  if use_cache:
+    with stage("write feature cache"):
+      tmp = f"{path}.tmp-{os.getpid()}"
+      os.makedirs(tmp, exist_ok=True)
+      sparse.save_npz(os.path.join(tmp, "X_train.npz"), X_train.tocsr())
+      sparse.save_npz(os.path.join(tmp, "X_test.npz"), X_test.tocsr())
+      np.save(os.path.join(tmp, "y_train.npy"), y_train.astype(str))
+      np.save(os.path.join(tmp, "y_test.npy"), y_test.astype(str))
+      joblib.dump(tfidf, os.path.join(tmp, "tfidf.joblib"))
+      open(os.path.join(tmp, "done"), "w").close()
+      shutil.rmtree(path, ignore_errors=True)  # leftovers of an interrupted run
+      try:
+        os.rename(tmp, path)
+      except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)  # a concurrent run got there first
+
+  return X_train, X_test, y_train, y_test, tfidf
+
+
+def train_xgboost(args):
+  """Default mode: cached TF-IDF features + XGBoost, like the original script."""
+  X_train, X_test, y_train, y_test, tfidf = load_or_build_tfidf(
+    args.data, args.cache_dir, use_cache=not args.no_cache
   )
 
-  # ----------------------------------------
-  # 3. Build supervised TF-IDF + XGBoost pipeline
-  # ----------------------------------------
+  # XGBoost needs integer class ids
+  label_encoder = LabelEncoder().fit(np.concatenate([y_train, y_test]))
+
   xgb_clf = XGBClassifier(
     n_estimators=250,
     max_depth=6,
@@ -135,41 +224,147 @@ def main():
     n_jobs=-1
   )
 
-  model = Pipeline(
-    steps=[
-      (
-        "tfidf",
-        TfidfVectorizer(
-          max_features=5000,
-          ngram_range=(1, 2),
-          stop_words="english"
-        ),
-      ),
-      ("clf", xgb_clf),
-    ]
-  )
-
   print("[INFO] Training supervised XGBoost career recommendation model...")
-  model.fit(X_train, y_train)
+  with stage("fit xgboost"):
+    xgb_clf.fit(X_train, label_encoder.transform(y_train))
 
-  # ----------------------------------------
-  # 4. Evaluate on held-out test set
-  # ----------------------------------------
   print("[INFO] Evaluating model...")
-  y_pred = model.predict(X_test)
+  with stage("evaluate"):
+    y_pred = label_encoder.inverse_transform(xgb_clf.predict(X_test))
 
   acc = accuracy_score(y_test, y_pred)
   print(f"[RESULT] Test Accuracy (XGBoost): {acc:.4f}\n")
 
   print("[RESULT] Classification report:")
-  print(classification_report(y_test, y_pred))
+  print(classification_report(y_test, y_pred, zero_division=0))
+
+  # already-fitted steps: the pipeline maps raw profile text -> class id
+  model = Pipeline(steps=[("tfidf", tfidf), ("clf", xgb_clf)])
+  with stage("save model"):
+    joblib.dump(model, args.model_out)
+    joblib.dump(label_encoder, label_encoder_path(args.model_out))
+  print(f"[INFO] Trained XGBoost model pipeline saved to: {args.model_out}")
+  print(f"[INFO] Label encoder saved to: {label_encoder_path(args.model_out)}")
+
 
-  # ----------------------------------------
-  # 5. Save model pipeline
-  # ----------------------------------------
-  joblib.dump(model, MODEL_PATH)
-  print(f"[INFO] Trained XGBoost model pipeline saved to: {MODEL_PATH}")
+def label_encoder_path(model_path):
+  root, ext = os.path.splitext(model_path)
+  return f"{root}_labels{ext or '.joblib'}"
+
+
+def iter_chunks(data_path, chunksize):
+  """(chunk index, DataFrame) pairs without loading the whole CSV."""
+  for i, chunk in enumerate(pd.read_csv(data_path, chunksize=chunksize)):
+    if TARGET_COL not in chunk.columns:
+      raise ValueError(f"Column '{TARGET_COL}' not found in dataset.")
+    yield i, chunk
+
+
+def train_streaming(args):
+  """
+  Larger-than-memory mode: the CSV is read in chunks, featurized with a
+  stateless HashingVectorizer and fed to SGDClassifier.partial_fit.
+  Every 5th row is held out for evaluation. Hashed chunks are cached per
+  dataset hash, so later epochs and reruns skip parsing and featurization.
+  """
+  with stage("hash dataset"):
+    data_hash = file_checksum(args.data)
+  path = os.path.join(args.cache_dir, cache_key(data_hash, "hashing", [HASHING_PARAMS, args.chunksize]))
+  use_cache = not args.no_cache
+  cached = use_cache and os.path.exists(os.path.join(path, "done"))
+  if use_cache and not cached:
+    shutil.rmtree(path, ignore_errors=True)  # leftovers of an interrupted run
+    os.makedirs(path)
+
+  hasher = HashingVectorizer(**HASHING_PARAMS)
+
+  def chunks():
+    """(train_mask, X, y) per chunk, from the cache when possible."""
+    offset = 0
+    if cached:
+      n = len([f for f in os.listdir(path) if f.endswith(".X.npz")])
+      source = (
+        (sparse.load_npz(os.path.join(path, f"{i}.X.npz")), np.load(os.path.join(path, f"{i}.y.npy")))
+        for i in range(n)
+      )
+    else:
+      source = featurize_chunks()
+    for X, y in source:
+      train_mask = (offset + np.arange(len(y))) % 5 != 4
+      offset += len(y)
+      yield train_mask, X, y
+
+  def featurize_chunks():
+    for i, chunk in iter_chunks(args.data, args.chunksize):
+      X = hasher.transform(build_profile_text(chunk)).tocsr()
+      y = chunk[TARGET_COL].astype(str).to_numpy()
+      if use_cache:
+        sparse.save_npz(os.path.join(path, f"{i}.X.npz"), X)
+        np.save(os.path.join(path, f"{i}.y.npy"), y.astype(str))
+      yield X, y
+
+  # partial_fit needs the full label set up front: one cheap pass over the target column
+  with stage("collect labels"):
+    labels = set()
+    if cached:
+      for i in range(len([f for f in os.listdir(path) if f.endswith(".y.npy")])):
+        labels.update(np.load(os.path.join(path, f"{i}.y.npy")))
+    else:
+      for chunk in pd.read_csv(args.data, usecols=[TARGET_COL], chunksize=args.chunksize):
+        labels.update(chunk[TARGET_COL].astype(str))
+  classes = np.array(sorted(labels))
+
+  clf = SGDClassifier(loss="log_loss", alpha=1e-5, random_state=42)
+
+  print("[INFO] Training streaming SGD career recommendation model...")
+  for epoch in range(args.epochs):
+    with stage(f"epoch {epoch + 1}"):
+      for train_mask, X, y in chunks():
+        if train_mask.any():
+          clf.partial_fit(X[train_mask], y[train_mask], classes=classes)
+    if use_cache and not cached:
+      open(os.path.join(path, "done"), "w").close()
+      cached = True
+
+  with stage("evaluate"):
+    y_true, y_pred = [], []
+    for train_mask, X, y in chunks():
+      test_mask = ~train_mask
+      if test_mask.any():
+        y_true.append(y[test_mask])
+        y_pred.append(clf.predict(X[test_mask]))
+
+  y_true = np.concatenate(y_true)
+  y_pred = np.concatenate(y_pred)
+  print(f"[RESULT] Held-out accuracy (streaming SGD): {accuracy_score(y_true, y_pred):.4f}\n")
+
+  model = Pipeline(steps=[("hash", hasher), ("clf", clf)])
+  with stage("save model"):
+    joblib.dump(model, args.model_out)
+  print(f"[INFO] Streaming model pipeline saved to: {args.model_out}")
+
+
+def parse_args(argv=None):
+  parser = argparse.ArgumentParser(description="Train the career recommendation model.")
+  parser.add_argument("--data", default=DATA_PATH, help="training CSV")
+  parser.add_argument("--model-out", default=MODEL_PATH, help="output model file")
+  parser.add_argument("--cache-dir", default=CACHE_DIR, help="feature cache directory")
+  parser.add_argument("--no-cache", action="store_true", help="always rebuild features")
+  parser.add_argument("--streaming", action="store_true",
+                      help="chunked HashingVectorizer + SGD partial_fit for larger-than-memory CSVs")
+  parser.add_argument("--chunksize", type=int, default=50_000, help="rows per chunk in --streaming mode")
+  parser.add_argument("--epochs", type=int, default=5, help="passes over the data in --streaming mode")
+  return parser.parse_args(argv)
+
+
+def main(argv=None):
+  args = parse_args(argv)
+  if args.streaming:
+    train_streaming(args)
+  else:
+    train_xgboost(args)
+  print_timings()
 
 
 if __name__ == "__main__":
-  main()
\ No newline at end of file
+  main(sys.argv[1:])
@@ -0,0 +1,222 @@
+# model_registry.py
+#
+# Loads the trained career classifier in backend/models/ once per process:
+#   ovr_logreg_model.joblib  - OneVsRest(LogisticRegression), 759 features
+#   skills_vec.joblib        - CountVectorizer over skills      (features 0..599)
+#   interests_vec.joblib     - CountVectorizer over interests   (next 150)
+#   label_encoder.joblib     - class index -> career name
+#   meta.json                - feature layout + label classes, checked at load
+#
+# Feature layout: [skills | interests | numeric_cols | edu_cols].
+
+import os
+import json
+import math
+import threading
+
+import joblib
+import numpy as np
+from scipy.special import expit
+
+from microbatch import MicroBatcher
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+
+# microbatching of concurrent predictions (see microbatch.py)
+BATCH_MAX_SIZE = int(os.getenv("CLASSIFIER_BATCH_SIZE", 64))
+BATCH_MAX_WAIT_MS = float(os.getenv("CLASSIFIER_BATCH_WAIT_MS", 2))
+
+# accepted spellings of the education level -> meta "edu_cols" suffix
+EDU_ALIASES = {
+    "10th": "10th", "class 10": "10th", "ssc": "10th",
+    "12th": "12th", "class 12": "12th", "hsc": "12th",
+    "diploma": "Diploma",
+    "ug": "UG", "undergraduate": "UG", "bachelors": "UG", "graduate": "UG",
+    "pg": "PG", "postgraduate": "PG", "masters": "PG",
+}
+
+
+def _as_text(value):
+    """List or string field -> one space-joined string for the vectorizer."""
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v) for v in value)
+    return str(value)
+
+
+def _as_float(value):
+    # "nan"/"inf" parse, but would poison every score (NaN in the response)
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return value if math.isfinite(value) else 0.0
+
+
+class CareerClassifier:
+    """
+    The OvR logistic-regression bundle with a DataFrame-free predict path.
+    OneVsRestClassifier on a multiclass target predicts argmax of the per-class
+    decision functions and normalizes the per-class sigmoids for
+    predict_proba; both are reproduced here with one matrix product.
+    """
+
+    def __init__(self, models_dir=MODELS_DIR):
+        self.models_dir = models_dir
+        self.model = joblib.load(os.path.join(models_dir, "ovr_logreg_model.joblib"))
+        self.skills_vec = joblib.load(os.path.join(models_dir, "skills_vec.joblib"))
+        self.interests_vec = joblib.load(os.path.join(models_dir, "interests_vec.joblib"))
+        self.label_encoder = joblib.load(os.path.join(models_dir, "label_encoder.joblib"))
+        with open(os.path.join(models_dir, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        features = self.meta["features"]
+        self.numeric_cols = features["numeric_cols"]
+        self.edu_cols = features["edu_cols"]
+
+        # stacked OvR weights: (n_classes, n_features) and (n_classes,)
+        self.coef = np.vstack([e.coef_ for e in self.model.estimators_])
+        self.intercept = np.concatenate([np.ravel(e.intercept_) for e in self.model.estimators_])
+
+        # CountVectorizer.transform() semantics without building a sparse matrix
+        self._analyzers = (self.skills_vec.build_analyzer(), self.interests_vec.build_analyzer())
+        self._vocabs = (self.skills_vec.vocabulary_, self.interests_vec.vocabulary_)
+
+        n_skills = len(self.skills_vec.vocabulary_)
+        n_interests = len(self.interests_vec.vocabulary_)
+        self._offsets = (0, n_skills)
+        self._numeric_offset = n_skills + n_interests
+        self._edu_offset = self._numeric_offset + len(self.numeric_cols)
+        self.n_features = self._edu_offset + len(self.edu_cols)
+
+        self.classes = list(self.label_encoder.inverse_transform(self.model.classes_))
+        self._check_shapes()
+
+    def _check_shapes(self):
+        """Fail loudly if the artifacts and meta.json disagree."""
+        features = self.meta["features"]
+        problems = []
+        if len(self.skills_vec.vocabulary_) != features["skills_vocab_size"]:
+            problems.append(f"skills vocab {len(self.skills_vec.vocabulary_)} != {features['skills_vocab_size']}")
+        if len(self.interests_vec.vocabulary_) != features["interests_vocab_size"]:
+            problems.append(f"interests vocab {len(self.interests_vec.vocabulary_)} != {features['interests_vocab_size']}")
+        if self.coef.shape[1] != self.n_features:
+            problems.append(f"model expects {self.coef.shape[1]} features, meta describes {self.n_features}")
+        if self.classes != list(self.meta["label_classes"]):
+            problems.append("label encoder classes differ from meta.json label_classes")
+        if problems:
+            raise RuntimeError(f"model artifacts in {self.models_dir} are inconsistent: " + "; ".join(problems))
+
+    def featurize(self, inputs):
+        """List of input dicts -> dense (N, n_features) matrix."""
+        X = np.zeros((len(inputs), self.n_features))
+        for n, data in enumerate(inputs):
+            for field, analyzer, vocab, offset in zip(
+                ("skills", "interests"), self._analyzers, self._vocabs, self._offsets
+            ):
+                for token in analyzer(_as_text(data.get(field))):
+                    j = vocab.get(token)
+                    if j is not None:
+                        X[n, offset + j] += 1.0
+
+            for j, col in enumerate(self.numeric_cols):
+                X[n, self._numeric_offset + j] = _as_float(data.get(col))
+
+            level = EDU_ALIASES.get(str(data.get("education_level") or "").strip().lower())
+            for j, col in enumerate(self.edu_cols):
+                if data.get(col) or col == f"edu_{level}":
+                    X[n, self._edu_offset + j] = 1.0
+        return X
+
+    def decision_function(self, X):
+        return X @ self.coef.T + self.intercept
+
+    def predict_proba(self, X):
+        proba = expit(self.decision_function(X))
+        proba /= proba.sum(axis=1, keepdims=True)
+        return proba
+
+    def predict_inputs_proba(self, inputs):
+        """List of input dicts -> (N, n_classes) probabilities."""
+        return self.predict_proba(self.featurize(inputs))
+
+    def top_k(self, proba, k):
+        """Class indices of the k largest probabilities in one row, best first."""
+        k = min(max(int(k), 0), len(proba))
+        if k == 0:
+            return np.empty(0, dtype=np.int64)
+        idx = np.argpartition(-proba, k - 1)[:k]
+        return idx[np.argsort(-proba[idx], kind="stable")]
+
+    def matched_skills(self, data, class_idx, limit=5):
+        """
+        Input skills ranked by their weight towards class_idx (positive only);
+        falls back to the first `limit` input skills like recommend() does.
+        """
+        skills = data.get("skills")
+        if isinstance(skills, str):
+            skills = [skills]
+        skills = [s for s in (skills or []) if isinstance(s, str) and s.strip()]
+
+        analyzer, vocab = self._analyzers[0], self._vocabs[0]
+        weights = self.coef[class_idx]
+        scored = []
+        for s in skills:
+            w = sum(weights[j] for j in (vocab.get(t) for t in analyzer(s)) if j is not None)
+            if w > 0:
+                scored.append((w, s))
+        scored.sort(key=lambda x: x[0], reverse=True)
+        return [s for _, s in scored[:limit]] or skills[:limit]
+
+    def format_results(self, data, proba, top_k=3):
+        """One probability row -> [{career, score, top_skills}] like model.recommend()."""
+        return [
+            {
+                "career": self.classes[i],
+                "score": float(round(proba[i], 4)),
+                "top_skills": self.matched_skills(data, i),
+            }
+            for i in self.top_k(proba, top_k)
+        ]
+
+    def predict(self, inputs):
+        """List of input dicts -> list of career names."""
+        scores = self.decision_function(self.featurize(inputs))
+        return [self.classes[i] for i in scores.argmax(axis=1)]
+
+
+_classifier = None
+_lock = threading.Lock()
+
+
+def get_classifier():
+    """Process-wide CareerClassifier, loaded on first call."""
+    global _classifier
+    if _classifier is None:
+        with _lock:
+            if _classifier is None:
+                _classifier = CareerClassifier()
+    return _classifier
+
+
+_batcher = None
+
+
+def get_batcher():
+    """
+    Process-wide MicroBatcher in front of the classifier:
+    batcher(input_dict) -> probability row over CareerClassifier.classes.
+    """
+    global _batcher
+    if _batcher is None:
+        clf = get_classifier()
+        with _lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(
+                    clf.predict_inputs_proba,
+                    max_batch=BATCH_MAX_SIZE,
+                    max_wait=BATCH_MAX_WAIT_MS / 1000,
+                    name="career-classifier",
+                )
+    return _batcher
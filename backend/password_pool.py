@@ -0,0 +1,143 @@
+# password_pool.py
+#
+# Password hashing off the request threads.
+# scrypt/pbkdf2 cost tens of milliseconds of CPU per call by design, so a
+# burst of logins run inline pins every worker. PasswordHasher runs them
+# on a small dedicated thread pool (hashlib releases the GIL while
+# hashing, so `workers` bounds the cores they can take) and refuses new
+# work with Overloaded once `workers + max_queue` jobs are in flight,
+# instead of letting the backlog and its latency grow without bound.
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class Overloaded(Exception):
+    """The hashing queue is full; the caller should answer 503."""
+
+
+def check_password(stored, password):
+    """werkzeug hashes, plus bcrypt ($2a$/$2b$) hashes from older accounts."""
+    if not isinstance(stored, str) or not stored or not isinstance(password, str):
+        return False
+    if stored.startswith("$2"):
+        try:
+            return bcrypt.checkpw(password.encode("utf-8"), stored.encode("utf-8"))
+        except ValueError:
+            return False
+    return check_password_hash(stored, password)
+
+
+class PasswordHasher:
+    """
+    method: werkzeug method string, e.g. "scrypt" or "pbkdf2:sha256:600000".
+    A stored hash whose parameters differ from what `method` produces today
+    is replaced on the next successful login (see verify()).
+    """
+
+    def __init__(self, method="scrypt", workers=2, max_queue=64, name="password-hash"):
+        self.method = method
+        self.workers = max(1, int(workers))
+        self.max_queue = max(0, int(max_queue))
+        self.name = name
+
+        self._target = None
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._jobs = 0
+        self._rejected = 0
+        self._rehashed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    def _executor(self):
+        # threads don't survive fork: one pool per process, created on first use
+        if self._pool is None or self._pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix=self.name)
+        return self._pool
+
+    def _submit(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise Overloaded(f"{self._in_flight} password hashes in flight")
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                done = time.perf_counter()
+                with self._lock:
+                    self._in_flight -= 1
+                    self._jobs += 1
+                    self._wait_total += started - submitted
+                    self._wait_max = max(self._wait_max, started - submitted)
+                    self._run_total += done - started
+
+        try:
+            return self._executor().submit(job)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+
+    def _outdated(self, stored):
+        if self._target is None:
+            # "scrypt" -> "scrypt:32768:8:1": the method prefix werkzeug writes today
+            self._target = generate_password_hash("", self.method).split("$", 1)[0]
+        return stored.split("$", 1)[0] != self._target
+
+    def _verify(self, stored, password):
+        if not check_password(stored, password):
+            return False, None
+        if not self._outdated(stored):
+            return True, None
+        with self._lock:
+            self._rehashed += 1
+        return True, generate_password_hash(password, self.method)
+
+    def hash(self, password, timeout=None):
+        """New hash for storage. Raises Overloaded when the queue is full."""
+        return self._submit(generate_password_hash, password, self.method).result(timeout)
+
+    def verify(self, stored, password, timeout=None):
+        """
+        (matches, new_hash): new_hash is set when the password matched but
+        `stored` uses outdated parameters; the caller should save it.
+        Raises Overloaded when the queue is full.
+        """
+        return self._submit(self._verify, stored, password).result(timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "method": self.method,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.workers),
+                "max_in_flight": self._max_in_flight,
+                "jobs": self._jobs,
+                "rejected": self._rejected,
+                "rehashed": self._rehashed,
+                "avg_wait_ms": self._wait_total / self._jobs * 1000 if self._jobs else 0.0,
+                "max_wait_ms": self._wait_max * 1000,
+                "avg_run_ms": self._run_total / self._jobs * 1000 if self._jobs else 0.0,
+            }
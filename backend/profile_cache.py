@@ -0,0 +1,212 @@
+# profile_cache.py
+#
+# Read cache for user documents (password and _id stripped), keyed by email.
+# Default store is a bounded in-process LRU with a TTL. With a shared
+# backend (Redis, or MemoryBackend as a local stand-in) every worker reads
+# and writes the same entries, so a save in one worker is seen by all.
+# Save paths write the updated document through; anything else that
+# changes a user calls invalidate(). A miss is filled only if the key is
+# still absent (SET NX), and invalidate() leaves a tombstone for `ttl`
+# instead of deleting, so a loader that read MongoDB before a concurrent
+# save or invalidation can't put the older document back over it.
+# The local store is per process: with several workers a save in one would
+# not reach the others, so it is only safe with a single worker. ttl=0
+# turns the cache off (every read goes to MongoDB).
+
+import json
+import time
+import threading
+from collections import OrderedDict
+
+
+class MemoryBackend:
+    """In-process stand-in for the Redis commands ProfileCache and TokenCache use."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and time.monotonic() >= expires:
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and key in self._data:
+                expires = self._data[key][1]
+                if expires is None or time.monotonic() < expires:
+                    return None
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    # sorted sets: key -> {member: score}
+    def zadd(self, key, mapping):
+        with self._lock:
+            zset = self._data.setdefault(key, ({}, None))[0]
+            zset.update(mapping)
+
+    def zrangebyscore(self, key, low, high, withscores=False):
+        low, high = float(low), float(high)
+        with self._lock:
+            zset = self._data.get(key, ({}, None))[0]
+            items = sorted((s, m) for m, s in zset.items() if low <= s <= high)
+        return [(m, s) for s, m in items] if withscores else [m for _, m in items]
+
+    def zremrangebyscore(self, key, low, high):
+        low, high = float(low), float(high)
+        with self._lock:
+            zset = self._data.get(key, ({}, None))[0]
+            for m in [m for m, s in zset.items() if low <= s <= high]:
+                del zset[m]
+
+
+def make_backend(url):
+    """'memory://' -> MemoryBackend, 'redis://...' -> redis client, '' -> None."""
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return MemoryBackend()
+    import redis  # optional dependency, only needed for a shared cache
+    return redis.Redis.from_url(url)
+
+
+class ProfileCache:
+    """
+    get(email, loader) returns the cached document or calls loader() and
+    caches its result with fill() (None is not cached). Returned documents
+    are shared: treat them as read-only. ttl <= 0 disables caching.
+    """
+
+    def __init__(self, maxsize=10_000, ttl=60, backend=None, prefix="profile:"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self.prefix = prefix
+        self.enabled = ttl > 0
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._invalidations = 0
+        self._fill_skipped = 0
+        self._evictions = 0
+        self._errors = 0
+
+    def _count(self, attr):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def _read(self, email):
+        if self.backend is not None:
+            try:
+                raw = self.backend.get(self.prefix + email)
+            except Exception:
+                self._count("_errors")
+                return None
+            # b"" is an invalidate() tombstone
+            return json.loads(raw) if raw else None
+
+        with self._lock:
+            item = self._local.get(email)
+            if item is None:
+                return None
+            doc, expires = item
+            if time.monotonic() >= expires:
+                del self._local[email]
+                return None
+            self._local.move_to_end(email)
+            return doc
+
+    def lookup(self, email):
+        """Cached document or None, counted as a hit or miss (async callers load + put themselves)."""
+        if not self.enabled:
+            return None
+        doc = self._read(email)
+        self._count("_hits" if doc is not None else "_misses")
+        return doc
+
+    def get(self, email, loader):
+        doc = self.lookup(email)
+        if doc is not None:
+            return doc
+        doc = loader()
+        if doc is not None:
+            self.fill(email, doc)
+        return doc
+
+    def fill(self, email, doc):
+        """Cache a document read after a miss, unless a save or invalidate() got there first."""
+        if not self.enabled:
+            return
+        self._store(email, doc, nx=True)
+
+    def put(self, email, doc):
+        """Write-through after a save (doc as returned by MongoDB)."""
+        if not self.enabled:
+            return
+        self._store(email, doc)
+
+    def invalidate(self, email):
+        if not self.enabled:
+            return
+        self._count("_invalidations")
+        # tombstone: reads miss, fill() can't bring back a document loaded before this
+        self._store(email, None)
+
+    def _store(self, email, doc, nx=False):
+        if self.backend is not None:
+            raw = json.dumps(doc, default=str) if doc is not None else ""
+            try:
+                stored = self.backend.set(self.prefix + email, raw, ex=self.ttl, nx=nx)
+            except Exception:
+                self._count("_errors")
+                return
+            if nx and not stored:
+                self._count("_fill_skipped")
+            elif doc is not None:
+                self._count("_writes")
+            return
+
+        with self._lock:
+            item = self._local.get(email)
+            if nx and item is not None and time.monotonic() < item[1]:
+                self._fill_skipped += 1
+                return
+            self._local[email] = (doc, time.monotonic() + self.ttl)
+            self._local.move_to_end(email)
+            self._writes += doc is not None
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+                self._evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "backend": type(self.backend).__name__ if self.backend is not None else "local",
+                "size": len(self._local) if self.backend is None else None,
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "writes": self._writes,
+                "invalidations": self._invalidations,
+                # misses not cached because a save/invalidate happened meanwhile
+                "fill_skipped": self._fill_skipped,
+                "evictions": self._evictions,
+                "errors": self._errors,
+            }
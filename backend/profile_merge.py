@@ -0,0 +1,77 @@
+# profile_merge.py
+#
+# Merging a /api/save-fullinfo payload into the stored profile in MongoDB.
+# The old handler read the whole profile, deep_merge()d the payload into it
+# and wrote it back, losing concurrent saves to other sections. Here the
+# payload becomes dotted `profile.a.b` paths for one atomic $set, with the
+# same result deep_merge() had:
+#   - dicts merge into stored documents, key by key
+#   - lists and scalars replace the stored value
+#   - an empty dict changes a stored document not at all, and is set
+#     anywhere else (missing key, stored list/scalar)
+#   - a dict where a list/scalar is stored replaces it (MongoDB can't walk
+#     a path through it: PATH_NOT_VIABLE, then the stored profile is read
+#     and only those subtrees are set whole)
+
+from pymongo.errors import OperationFailure
+
+# MongoDB error code for a $set path that runs through a non-document
+PATH_NOT_VIABLE = 28
+
+
+def path_key(key):
+    """Usable as one component of a dotted $set path."""
+    return isinstance(key, str) and key and "." not in key and not key.startswith("$")
+
+
+def flatten_set(value, prefix, stored=None):
+    """
+    Nested dict -> {dotted.path: leaf} for one $set that merges like deep_merge().
+    Subtrees whose keys can't be used in a path ('.', leading '$') are set whole.
+    stored: the current value at `prefix` (None if absent or unknown); a
+    subtree whose stored counterpart isn't a document is set whole, and
+    empty dicts are only emitted where no document is stored.
+    """
+    stored = stored if isinstance(stored, dict) else {}
+    out = {}
+    for k, v in value.items():
+        path = f"{prefix}.{k}"
+        current = stored.get(k)
+        if isinstance(v, dict) and not v:
+            if not isinstance(current, dict):
+                out[path] = {}
+        elif isinstance(v, dict) and (k not in stored or isinstance(current, dict)) and all(path_key(x) for x in v):
+            out.update(flatten_set(v, path, current))
+        else:
+            out[path] = v
+    return out
+
+
+def stored_paths(payload, profile):
+    """flatten_set() against the stored profile (None if the user has none yet)."""
+    if profile is not None and not isinstance(profile, dict):
+        return {"profile": payload}
+    return flatten_set(payload, "profile", profile)
+
+
+def merge_profile(payload, update, load_profile):
+    """
+    Apply `payload` (dict of top-level profile sections) to the stored profile.
+    update(doc) runs one (upserting) update and returns its result;
+    load_profile() returns the stored profile, or None. It is only called
+    when the paths depend on what is stored.
+    """
+    paths = flatten_set(payload, "profile")
+    if any(v == {} for v in paths.values()):
+        # whether {} is written depends on what's stored there
+        paths = stored_paths(payload, load_profile())
+    if not paths:
+        return update({"$setOnInsert": {"profile": {}}})
+    try:
+        return update({"$set": paths})
+    except OperationFailure as e:
+        if e.code != PATH_NOT_VIABLE:
+            raise
+        # a stored non-dict (e.g. a list) where the payload nests a dict:
+        # set just those subtrees whole, keep merging everything else
+        return update({"$set": stored_paths(payload, load_profile())})
@@ -0,0 +1,72 @@
+# result_cache.py
+#
+# Bounded LRU cache for recommender results, keyed by a fingerprint of the
+# normalized profile (see model.profile_fingerprint). Entries belong to one
+# model version (dataset checksum + WEIGHTS); when the version changes the
+# whole cache is dropped instead of serving stale rankings.
+
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    """Thread-safe LRU: get/put by (version, key), with hit/miss counters."""
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = max(0, int(maxsize))
+        self._data = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def _check_version(self, version):
+        # caller holds the lock
+        if version != self._version:
+            if self._data:
+                self._invalidations += 1
+            self._data.clear()
+            self._version = version
+
+    def get(self, version, key):
+        """Cached value or None."""
+        with self._lock:
+            self._check_version(version)
+            value = self._data.get(key)
+            if value is None:
+                self._misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, version, key, value):
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "version": self._version,
+            }
@@ -0,0 +1,336 @@
+# roadmaps.py
+#
+# In-process catalog of the careerRoadmaps templates.
+# The collection is small (one document per career) and read on every
+# /api/roadmap call, so it is loaded whole and looked up in dictionaries:
+#   exact career name -> normalized name (case/whitespace) -> slug.
+# It reloads every `ttl` seconds, and immediately when a change stream
+# (replica sets / Atlas) reports a write. Reloads run on a background
+# thread and swap the new dictionaries in, so lookups keep using the
+# current ones meanwhile; only the very first lookup (or warm() at
+# startup) loads synchronously. On a standalone server the
+# watcher just isn't available and the TTL alone applies. A stream that
+# breaks is reopened with backoff from its last resume token; if it can't
+# resume, the catalog reloads since changes may have been missed.
+#
+# Each template is compiled once (CompiledRoadmap): skills lower-cased and
+# numbered, every task's related skills folded into a bitmask, so
+# personalizing for a profile is a few integer ANDs per task.
+
+import os
+import re
+import time
+import threading
+
+from pymongo.errors import OperationFailure
+
+_SPACES = re.compile(r"\s+")
+_NON_SLUG = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_career(name):
+    """Case- and whitespace-insensitive career key."""
+    return _SPACES.sub(" ", str(name)).strip().casefold()
+
+
+def slugify(name):
+    """'AI / ML Engineer' -> 'ai-ml-engineer'."""
+    return _NON_SLUG.sub("-", str(name).lower()).strip("-")
+
+
+# learning pace -> duration multiplier
+PACE_FACTORS = {
+    "fast": 0.75,
+    "moderate": 1.0,
+    "slow": 1.5
+}
+
+
+def pick_format_hint(learning_formats):
+    """
+    Simple heuristic based on user's preferred learning formats.
+    Adjust strings to match whatever you actually store.
+    """
+    if not learning_formats:
+        return "Use a mix of video, text, and projects."
+
+    lf = [str(s).lower() for s in learning_formats]
+
+    if any("video" in s for s in lf):
+        return "Prefer video courses and recorded lectures."
+    if any("project" in s or "hands-on" in s for s in lf):
+        return "Prefer project-based resources and practical tasks."
+    if any("text" in s or "reading" in s for s in lf):
+        return "Prefer articles, documentation, and books."
+
+    return "Use a mix of video, text, and projects."
+
+
+class CompiledRoadmap:
+    """
+    One roadmap template in personalization-ready form.
+    Skills are numbered per template; a set of skills is an int bitmask.
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.skill_ids = {}
+
+        self.core = [(s, self._bit(s)) for s in (str(x).lower() for x in doc.get("core_skills", []))]
+        self.nice = [(s, self._bit(s)) for s in (str(x).lower() for x in doc.get("nice_to_have_skills", []))]
+        self.template_mask = 0
+        for _, bit in self.core + self.nice:
+            self.template_mask |= bit
+
+        # [(phase fields, base duration, [(task fields, related mask), ...]), ...]
+        self.phases = []
+        for phase in doc.get("phases", []):
+            tasks = []
+            for task in phase.get("tasks", []):
+                related = task.get("related_skills", [])
+                mask = 0
+                for skill in related:
+                    mask |= self._bit(str(skill).lower())
+                fields = {
+                    "id": task.get("id"),
+                    "title": task.get("title"),
+                    "description": task.get("description"),
+                    "level": task.get("level"),
+                    "related_skills": related,
+                }
+                tasks.append((fields, mask))
+            self.phases.append((
+                {"id": phase.get("id"), "title": phase.get("title")},
+                phase.get("recommended_duration_months", 3),
+                tasks,
+            ))
+
+    def _bit(self, skill):
+        return 1 << self.skill_ids.setdefault(skill, len(self.skill_ids))
+
+    def user_mask(self, user_skills):
+        """Lower-cased user skills -> bitmask of the ones this roadmap mentions."""
+        mask = 0
+        for s in user_skills:
+            i = self.skill_ids.get(s)
+            if i is not None:
+                mask |= 1 << i
+        return mask
+
+    def personalize(self, user_skills, format_hint, pace_factor):
+        """Personalized roadmap for a set of lower-cased user skills."""
+        have = self.user_mask(user_skills)
+        # gaps: roadmap skills the user doesn't have
+        gaps = self.template_mask & ~have
+
+        phases = []
+        for fields, base_duration, tasks in self.phases:
+            personalized_tasks = []
+            for task_fields, related in tasks:
+                if related and not related & ~have:
+                    priority, status = "low", "already strong"
+                elif related & gaps:
+                    priority, status = "high", "focus"
+                else:
+                    priority, status = "medium", "normal"
+                personalized_tasks.append(dict(
+                    task_fields,
+                    priority=priority,
+                    status=status,
+                    preferred_format_hint=format_hint,
+                ))
+            phases.append(dict(
+                fields,
+                recommended_duration_months=base_duration,
+                personalized_duration_months=round(base_duration * pace_factor, 1),
+                tasks=personalized_tasks,
+            ))
+
+        doc = self.doc
+        return {
+            "career": doc.get("career"),
+            "slug": doc.get("slug"),
+            "short_description": doc.get("short_description"),
+            "skill_gaps": {
+                "core_missing": [s for s, bit in self.core if not bit & have],
+                "nice_to_have_missing": [s for s, bit in self.nice if not bit & have],
+            },
+            "phases": phases,
+            "recommended_courses": doc.get("recommended_courses", [])
+        }
+
+
+def personalize_roadmap(roadmap, profile):
+    """
+    Takes a roadmap template (document or CompiledRoadmap) and a user
+    profile dict, returns a personalized roadmap structure.
+    """
+    if not isinstance(roadmap, CompiledRoadmap):
+        roadmap = CompiledRoadmap(roadmap)
+
+    user_skills = {s.lower() for s in profile.get("skills", []) if isinstance(s, str)}
+    format_hint = pick_format_hint(profile.get("learning_formats", []) or [])
+    pace_factor = PACE_FACTORS.get((profile.get("learning_pace") or "moderate").lower(), 1.0)
+    return roadmap.personalize(user_skills, format_hint, pace_factor)
+
+
+# "$changeStream is only supported on replica sets"
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+
+class RoadmapCatalog:
+    """
+    Compiled roadmap templates by career, loaded lazily; lookups never query MongoDB.
+    The watcher retries a failed change stream after retry_min, doubling up to retry_max seconds.
+    """
+
+    def __init__(self, collection, ttl=300, watch=True, retry_min=1.0, retry_max=60.0):
+        self.collection = collection
+        self.ttl = ttl
+        self.watch = watch
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        # (by_career, by_key, by_slug), replaced as a whole
+        self._maps = None
+        self._loaded_at = None
+        self._version = 0
+        self._loaded_version = -1
+        self._lock = threading.Lock()
+        self._reloading = False
+        self._pid = None
+        self._watcher_pid = None
+
+    def _build(self):
+        by_career, by_key, by_slug = {}, {}, {}
+        for raw in self.collection.find({}, {"_id": 0}):
+            doc = CompiledRoadmap(raw)
+            career = raw.get("career")
+            if isinstance(career, str):
+                # first document wins, like find_one() did
+                by_career.setdefault(career, doc)
+                by_key.setdefault(normalize_career(career), doc)
+                by_slug.setdefault(slugify(career), doc)
+            if isinstance(raw.get("slug"), str):
+                by_slug.setdefault(slugify(raw["slug"]), doc)
+        return by_career, by_key, by_slug
+
+    def _stale(self):
+        return (
+            self._loaded_at is None
+            or self._loaded_version != self._version
+            or time.monotonic() - self._loaded_at >= self.ttl
+        )
+
+    def _ensure_loaded(self):
+        if self.watch and self._watcher_pid != os.getpid():
+            self._start_watcher()
+        if self._maps is None:
+            with self._lock:
+                if self._maps is None:
+                    version = self._version
+                    self._maps = self._build()
+                    self._loaded_at = time.monotonic()
+                    self._loaded_version = version
+        elif self._stale():
+            self._schedule_reload()
+
+    def _schedule_reload(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # the reload thread doesn't survive fork
+                self._pid = os.getpid()
+                self._reloading = False
+            if self._reloading:
+                return
+            self._reloading = True
+        threading.Thread(target=self._reload, name="roadmap-reload", daemon=True).start()
+
+    def _reload(self):
+        # loops while invalidate() calls keep arriving during a build
+        while True:
+            version = self._version
+            try:
+                maps = self._build()
+            except Exception as e:
+                print("roadmap reload failed, retrying in", self.ttl, "s:", e)
+                with self._lock:
+                    self._loaded_at = time.monotonic()
+                    self._loaded_version = version
+                    self._reloading = False
+                return
+            with self._lock:
+                self._maps = maps
+                self._loaded_at = time.monotonic()
+                self._loaded_version = version
+                if self._version == version:
+                    self._reloading = False
+                    return
+
+    def warm(self):
+        """Start the watcher and load the catalog in the background."""
+        if self.watch and self._watcher_pid != os.getpid():
+            self._start_watcher()
+        self._schedule_reload()
+
+    def _start_watcher(self):
+        # threads don't survive fork: one watcher per process
+        with self._lock:
+            if self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+        threading.Thread(target=self._watch, name="roadmap-watch", daemon=True).start()
+
+    def _watch(self):
+        token = None
+        delay = self.retry_min
+        while True:
+            opened, error = False, "stream closed"
+            try:
+                with self.collection.watch(resume_after=token) as stream:
+                    opened = True
+                    token = stream.resume_token or token
+                    for change in stream:
+                        token = change["_id"]
+                        delay = self.retry_min
+                        self.invalidate()
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                    # standalone servers have no change streams: rely on the TTL
+                    print("roadmap change stream unavailable, reloading every", self.ttl, "s:", e)
+                    return
+                error = e
+            except Exception as e:
+                error = e
+            if not opened and token is not None:
+                # token too old (oplog rolled over) or invalid: start fresh
+                token = None
+            if token is None:
+                # no position to resume from: whatever happened meanwhile is unknown
+                self.invalidate()
+            print("roadmap change stream failed, retrying in", delay, "s:", error)
+            time.sleep(delay)
+            delay = min(delay * 2, self.retry_max)
+
+    def invalidate(self):
+        """Reload now, in the background, if the catalog has been loaded."""
+        with self._lock:
+            self._version += 1
+            loaded = self._maps is not None
+        if loaded:
+            self._schedule_reload()
+
+    def get(self, career):
+        """CompiledRoadmap for a career name (any case/spacing) or slug, or None."""
+        if not isinstance(career, str) or not career.strip():
+            return None
+        self._ensure_loaded()
+        by_career, by_key, by_slug = self._maps
+        return (
+            by_career.get(career)
+            or by_key.get(normalize_career(career))
+            or by_slug.get(slugify(career))
+        )
+
+    def careers(self):
+        self._ensure_loaded()
+        return list(self._maps[0])
@@ -0,0 +1,412 @@
+# search_index.py
+#
+# In-process typeahead index over the master_* collections.
+# Replaces the per-keystroke unanchored case-insensitive $regex (a full
+# collection scan + sort in MongoDB) with:
+#   - a lower-cased sorted array for prefix lookups (bisect)
+#   - a 1/2/3-gram posting index for substring lookups
+# Results keep the old contract: case-insensitive substring match, ordered
+# like MongoDB's sort("name", 1), capped at `limit`.
+#
+# RankedIndex adds typo-tolerant, popularity-boosted ranking on top (what
+# the search endpoints serve); NameIndex.search stays available for the old
+# literal, alphabetical behaviour.
+
+import os
+import re
+import math
+import time
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+import numpy as np
+
+# highest code point: ql + _MAX_CHAR sorts after every string starting with ql
+_MAX_CHAR = "\U0010ffff"
+
+
+class NameIndex:
+    """Immutable prefix + n-gram index over one list of names."""
+
+    GRAM_SIZES = (1, 2, 3)
+
+    def __init__(self, names):
+        # MongoDB compares strings by UTF-8 bytes == Python code point order
+        self.names = sorted({n for n in names if isinstance(n, str)})
+        self.lowered = [n.lower() for n in self.names]
+
+        # prefix lookups: positions ordered by lower-cased name
+        self._by_lower = sorted(range(len(self.names)), key=self.lowered.__getitem__)
+        self._sorted_lower = [self.lowered[i] for i in self._by_lower]
+
+        # substring lookups: gram -> ascending positions (i.e. in result order)
+        grams = defaultdict(list)
+        for pos, s in enumerate(self.lowered):
+            seen = set()
+            for n in self.GRAM_SIZES:
+                for i in range(len(s) - n + 1):
+                    seen.add(s[i:i + n])
+            for g in seen:
+                grams[g].append(pos)
+        self._grams = dict(grams)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        i = bisect_left(self.names, name)
+        return i < len(self.names) and self.names[i] == name
+
+    def _candidates(self, ql):
+        """Positions that may contain ql, ascending; None means 'all'."""
+        if not ql:
+            return None
+        n = max(self.GRAM_SIZES)
+        grams = {ql[i:i + n] for i in range(len(ql) - n + 1)} if len(ql) >= n else {ql}
+        postings = []
+        for g in grams:
+            p = self._grams.get(g)
+            if p is None:
+                return []
+            postings.append(p)
+        postings.sort(key=len)
+        if len(postings) == 1:
+            return postings[0]
+        # intersect a few of the rarest grams; the final substring check is exact anyway
+        keep = set(postings[1])
+        for p in postings[2:4]:
+            keep.intersection_update(p)
+        return [pos for pos in postings[0] if pos in keep]
+
+    def search(self, q, limit=50, skip_blank=False):
+        """Case-insensitive substring match, in name order, at most `limit`."""
+        ql = q.lower()
+        candidates = self._candidates(ql)
+        if candidates is None:
+            candidates = range(len(self.names))
+
+        out = []
+        for pos in candidates:
+            if ql in self.lowered[pos] and (not skip_blank or self.names[pos].strip()):
+                out.append(self.names[pos])
+                if len(out) >= limit:
+                    break
+        return out
+
+    def prefix(self, q, limit=50):
+        """Case-insensitive prefix match, in name order, at most `limit`."""
+        ql = q.lower()
+        lo = bisect_left(self._sorted_lower, ql)
+        hi = bisect_left(self._sorted_lower, ql + _MAX_CHAR, lo)
+        return [self.names[pos] for pos in sorted(self._by_lower[lo:hi])[:limit]]
+
+
+_WORD = re.compile(r"[0-9a-z]+")
+
+
+def _trigrams(word):
+    """pg_trgm-style grams of one word, padded as '  word ' so the start weighs more."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def prefix_distance(q, s, max_d):
+    """
+    Smallest optimal-string-alignment distance between q and any prefix of s,
+    i.e. how many typos turn what the user typed into the start of s
+    ('pyhton' -> 'python' is 1). Only the |i - j| <= max_d band is filled;
+    returns max_d + 1 once the distance exceeds max_d.
+    """
+    big = max_d + 1
+    s = s[:len(q) + max_d]
+    m = len(s)
+    prev2 = None
+    prev = [j if j <= max_d else big for j in range(m + 1)]
+    for i in range(1, len(q) + 1):
+        cur = [big] * (m + 1)
+        if i <= max_d:
+            cur[0] = i
+        qi = q[i - 1]
+        best = cur[0]
+        for j in range(max(1, i - max_d), min(m, i + max_d) + 1):
+            sj = s[j - 1]
+            v = prev[j - 1] if qi == sj else prev[j - 1] + 1
+            if prev[j] + 1 < v:
+                v = prev[j] + 1
+            if cur[j - 1] + 1 < v:
+                v = cur[j - 1] + 1
+            if i > 1 and j > 1 and qi == s[j - 2] and q[i - 2] == sj and prev2[j - 2] + 1 < v:
+                v = prev2[j - 2] + 1
+            cur[j] = v
+            if v < best:
+                best = v
+        if best > max_d:
+            return big
+        prev2, prev = prev, cur
+    return min(min(prev), big)
+
+
+class RankedIndex(NameIndex):
+    """
+    NameIndex plus ranked, typo-tolerant search.
+    popularity: name -> count (dataset rows + saved profiles using it).
+
+    Matching happens per word: every query word is looked up among the
+    distinct words of all names (prefix via bisect, typos via a word trigram
+    index + prefix_distance), so the edit distance runs over a few dozen
+    short words instead of 100k names. The per-word hits are then spread onto
+    the names with numpy and only the best CANDIDATES are ranked in Python.
+    """
+
+    CANDIDATES = 48           # names ranked exactly per query
+    ACRONYM_CANDIDATES = 16   # most popular names kept per acronym prefix
+    FUZZY_WORDS = 12          # typo candidates checked per query word
+    FUZZY_MIN_MATCHES = 8     # look for typos only when fewer words match literally
+    SHORT_QUERY = 2           # results for queries this short are memoized
+    POPULARITY_WEIGHT = 1.5
+
+    def __init__(self, names, popularity=None):
+        super().__init__(names)
+        self.popularity = dict(popularity or {})
+
+        counts = np.array([self.popularity.get(n.strip(), 0) for n in self.names], dtype=np.float64)
+        top = math.log1p(counts.max()) if len(counts) and counts.max() > 0 else 1.0
+        self._pop = np.log1p(counts) / top
+        # shorter names win ties ("Python" before "Python (Lab)")
+        self._prior = self.POPULARITY_WEIGHT * self._pop - 0.002 * np.array([len(n) for n in self.names])
+
+        word_names = defaultdict(list)
+        acronyms = defaultdict(list)
+        for pos, lowered in enumerate(self.lowered):
+            words = _WORD.findall(lowered)
+            for w in set(words):
+                word_names[w].append(pos)
+            initials = "".join(w[0] for w in words)
+            for k in range(2, min(len(initials), 4) + 1):
+                acronyms[initials[:k]].append(pos)
+
+        self._words = sorted(word_names)
+        self._word_names = [np.asarray(word_names[w], dtype=np.int32) for w in self._words]
+        word_grams = defaultdict(list)
+        for wid, w in enumerate(self._words):
+            for g in _trigrams(w):
+                word_grams[g].append(wid)
+        self._word_grams = {g: np.asarray(ids, dtype=np.int32) for g, ids in word_grams.items()}
+        self._acronyms = {
+            a: sorted(ps, key=lambda p: -self._pop[p])[:self.ACRONYM_CANDIDATES]
+            for a, ps in acronyms.items()
+        }
+        self._short = {}
+
+    def _word_matches(self, qw):
+        """Words matching one query word -> (word ids, match quality in (0, 1])."""
+        lo = bisect_left(self._words, qw)
+        hi = bisect_left(self._words, qw + _MAX_CHAR, lo)
+        ids = list(range(lo, hi))
+        quality = [1.0 if self._words[i] == qw else 0.8 for i in ids]
+
+        if len(qw) >= 3 and hi - lo < self.FUZZY_MIN_MATCHES:
+            postings = [self._word_grams[g] for g in _trigrams(qw) if g in self._word_grams]
+            if postings:
+                wids, shared = np.unique(np.concatenate(postings), return_counts=True)
+                if len(wids) > self.FUZZY_WORDS:
+                    wids = wids[np.argpartition(-shared, self.FUZZY_WORDS - 1)[:self.FUZZY_WORDS]]
+                max_d = 1 if len(qw) < 8 else 2
+                for wid in wids.tolist():
+                    if lo <= wid < hi:
+                        continue
+                    d = prefix_distance(qw, self._words[wid], max_d)
+                    if d <= max_d:
+                        ids.append(wid)
+                        quality.append(0.6 * (1 - d / (len(qw) + 1)))
+        return ids, quality
+
+    def _name_scores(self, qwords):
+        """
+        (positions, summed per-word match quality) of the names matching every
+        query word, or failing that any of them; positions may repeat.
+        None when no query word matches anything.
+        """
+        hits = []
+        for qw in qwords:
+            ids, quality = self._word_matches(qw)
+            if ids:
+                postings = [self._word_names[i] for i in ids]
+                hits.append((
+                    np.concatenate(postings),
+                    np.repeat(np.asarray(quality, dtype=np.float32), [len(p) for p in postings]),
+                ))
+        if not hits:
+            return None
+        if len(qwords) == 1:
+            return hits[0]
+
+        every = np.ones(len(self.names), dtype=bool)
+        total = np.zeros(len(self.names), dtype=np.float32)
+        for pos, values in hits:
+            score = np.zeros(len(self.names), dtype=np.float32)
+            np.maximum.at(score, pos, values)
+            every &= score > 0
+            total += score
+        if len(hits) < len(qwords) or not every.any():
+            every = total > 0
+        pos = np.concatenate([pos for pos, _ in hits])
+        pos = pos[every[pos]]
+        return pos, total[pos]
+
+    def ranked(self, q, limit=50):
+        """Best matches for q: exact > name prefix > word prefixes > acronym > typos."""
+        ql = " ".join(_WORD.findall(q.lower()))
+        if not ql:
+            # empty or punctuation-only: nothing to rank, keep the literal behaviour
+            return self.search(q, limit, skip_blank=True)
+        key = (ql, limit)
+        if len(ql) <= self.SHORT_QUERY and key in self._short:
+            return self._short[key]
+
+        qwords = ql.split()
+        candidates = {}
+        matched = self._name_scores(qwords)
+        if matched is not None:
+            pos, scores = matched
+            # 2x: a name shows up once per word it matched
+            n = 2 * self.CANDIDATES
+            if len(pos) > n:
+                top = np.argpartition(-(scores + self._prior[pos]), n - 1)[:n]
+                pos, scores = pos[top], scores[top]
+            for p, rel in zip(pos.tolist(), (scores / len(qwords)).tolist()):
+                if rel > candidates.get(p, 0.0):
+                    candidates[p] = rel
+        compact = ql.replace(" ", "")
+        if len(compact) >= 2:
+            for p in self._acronyms.get(compact, ()):
+                candidates[p] = max(candidates.get(p, 0.0), 0.9)
+
+        ranked = []
+        for p, rel in candidates.items():
+            name = self.lowered[p]
+            tier = 10.0 if name == q.lower().strip() else 3.0 if name.startswith(ql) else 0.0
+            ranked.append((-(tier + 4.0 * rel + self._prior[p]), p))
+        ranked.sort()
+        out = [self.names[p] for _, p in ranked[:limit]]
+        if not out:
+            # mid-word fragments ("script"): fall back to the literal match
+            out = self.search(q, limit, skip_blank=True)
+        if len(ql) <= self.SHORT_QUERY:
+            self._short[key] = out
+        return out
+
+
+class SearchIndexes:
+    """
+    One RankedIndex per master collection.
+    Indexes are immutable and rebuilt on a background thread, then swapped
+    in, so a search never waits for a build (or for the popularity
+    aggregation): it uses the current index until the new one is ready.
+      - add(): freshly upserted names, folded in by the builder (coalesced)
+      - every `ttl` s: full reload from MongoDB, picking up writes from
+        other processes (workers, seed scripts)
+    The very first get() of a collection loads its names synchronously,
+    without popularity; warm() at startup usually gets there first.
+    """
+
+    def __init__(self, collections, ttl=300, popularity=None):
+        self.collections = {c.name: c for c in collections}
+        self.ttl = ttl
+        # optional collection name -> {name: count}, for RankedIndex
+        self.popularity = popularity
+        self._indexes = {}
+        self._loaded_at = {}
+        self._pending = {}
+        self._reload = set()
+        self._building = set()
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _load(self, name, with_popularity=True):
+        """Fresh index from MongoDB (no lock needed: nothing shared is touched)."""
+        docs = self.collections[name].find({}, {"_id": 0, "name": 1})
+        popularity = self.popularity(name) if self.popularity and with_popularity else None
+        return RankedIndex((d.get("name") for d in docs), popularity)
+
+    def _schedule(self, name, reload=False):
+        """Make sure a builder thread will pick up the pending work for `name`."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # builder threads don't survive fork
+                self._pid = os.getpid()
+                self._building.clear()
+            if reload:
+                self._reload.add(name)
+            if name in self._building:
+                return  # the running builder loops until nothing is pending
+            self._building.add(name)
+        threading.Thread(target=self._build, args=(name,), name=f"search-index-{name}", daemon=True).start()
+
+    def _build(self, name):
+        while True:
+            with self._lock:
+                reload = name in self._reload
+                self._reload.discard(name)
+                new = self._pending.pop(name, set())
+                if not reload and not new:
+                    self._building.discard(name)
+                    return
+                current = self._indexes.get(name)
+            try:
+                if reload:
+                    # names add()ed meanwhile are already in MongoDB or still pending
+                    index = self._load(name)
+                else:
+                    new = [n for n in new if n not in current]
+                    if not new:
+                        continue
+                    index = RankedIndex(current.names + new, current.popularity)
+            except Exception as e:
+                print(f"search index rebuild for {name} failed:", e)
+                continue
+            with self._lock:
+                self._indexes[name] = index
+                if reload:
+                    self._loaded_at[name] = time.monotonic()
+
+    def warm(self):
+        """Start loading every collection in the background."""
+        for name in self.collections:
+            self._schedule(name, reload=True)
+
+    def get(self, coll):
+        """Current index for a collection; schedules a reload when older than ttl."""
+        name = coll if isinstance(coll, str) else coll.name
+        index = self._indexes.get(name)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(name)
+                if index is None:
+                    index = self._load(name, with_popularity=False)
+                    self._indexes[name] = index
+                    self._loaded_at[name] = time.monotonic() - self.ttl  # reload with popularity
+        if time.monotonic() - self._loaded_at[name] >= self.ttl:
+            with self._lock:
+                stale = time.monotonic() - self._loaded_at[name] >= self.ttl
+                if stale:
+                    # don't reschedule on every request while the reload runs
+                    self._loaded_at[name] = time.monotonic()
+            if stale:
+                self._schedule(name, reload=True)
+        return index
+
+    def refresh(self, coll=None):
+        """Reload one collection (or all of them) in the background."""
+        for name in ([coll if isinstance(coll, str) else coll.name] if coll is not None else self.collections):
+            self._schedule(name, reload=True)
+
+    def add(self, coll, names):
+        """Make freshly upserted names searchable without a MongoDB round trip."""
+        name = coll if isinstance(coll, str) else coll.name
+        with self._lock:
+            if name not in self._indexes:
+                return  # not loaded yet; the first load reads them from MongoDB
+            self._pending.setdefault(name, set()).update(n for n in names if isinstance(n, str))
+        self._schedule(name)
@@ -0,0 +1,97 @@
+# snapshot.py
+#
+# On-disk binary snapshot of the parsed recommender dataset.
+# A snapshot is a directory of raw .npy arrays (loaded with mmap_mode="r")
+# plus a meta.json holding the vocabulary tables. Its name carries the
+# format version and the CSV checksum, so a changed CSV or a new format
+# simply misses and gets rebuilt.
+
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+def file_checksum(path, chunk_size=1 << 20):
+    """sha256 of a file, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def snapshot_path(root, checksum):
+    return os.path.join(root, f"v{FORMAT_VERSION}-{checksum[:16]}")
+
+
+def save(root, checksum, arrays, meta, replace=False):
+    """
+    Write arrays + meta into a fresh snapshot directory.
+    Built in a temp dir and renamed into place, so concurrent builders
+    (e.g. several gunicorn workers booting at once) never see a partial one.
+    An existing snapshot for the same checksum is kept unless `replace`
+    (forced rebuild, or one that failed to load): then it is renamed aside
+    and the new one swapped in. Older snapshots in `root` are removed.
+    """
+    final = snapshot_path(root, checksum)
+    tmp = f"{final}.tmp-{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp, name + ".npy"), np.ascontiguousarray(arr))
+
+    meta = dict(meta, format_version=FORMAT_VERSION, checksum=checksum, arrays=sorted(arrays))
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    aside = None
+    if replace and os.path.exists(final):
+        # rename() won't replace a non-empty directory; ".tmp-" keeps other
+        # processes' cleanup away from it until it's removed below
+        aside = f"{final}.tmp-old-{os.getpid()}"
+        try:
+            os.rename(final, aside)
+        except OSError:
+            aside = None  # someone else swapped it first
+    try:
+        os.rename(tmp, final)
+    except OSError:
+        # another process won the race; its snapshot is identical
+        shutil.rmtree(tmp, ignore_errors=True)
+    if aside is not None:
+        shutil.rmtree(aside, ignore_errors=True)
+
+    # drop stale snapshots, but leave other processes' in-progress builds alone
+    for entry in os.listdir(root):
+        path = os.path.join(root, entry)
+        if path != final and ".tmp-" not in entry:
+            shutil.rmtree(path, ignore_errors=True)
+    return final
+
+
+def load(root, checksum):
+    """
+    Return (arrays, meta) for the snapshot matching `checksum`, or None.
+    Arrays are read-only memory maps.
+    """
+    path = snapshot_path(root, checksum)
+    meta_file = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_file):
+        return None
+
+    try:
+        with open(meta_file, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != FORMAT_VERSION or meta.get("checksum") != checksum:
+            return None
+        arrays = {
+            name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r")
+            for name in meta["arrays"]
+        }
+    except (OSError, ValueError, KeyError):
+        return None
+    return arrays, meta
@@ -0,0 +1,62 @@
+# test_profile_cache.py
+#
+# A miss must never overwrite what a concurrent save wrote through (or
+# bring back a document invalidate() dropped), locally or in the shared store.
+#
+#   cd backend && python -m pytest -q tests/test_profile_cache.py
+
+import pytest
+
+from profile_cache import ProfileCache, MemoryBackend
+
+
+@pytest.fixture(params=["local", "shared"])
+def cache(request):
+    backend = MemoryBackend() if request.param == "shared" else None
+    return ProfileCache(ttl=60, backend=backend)
+
+
+def test_miss_is_cached(cache):
+    loads = []
+    loader = lambda: loads.append(1) or {"email": "a@x.io", "v": 1}
+    assert cache.get("a@x.io", loader) == {"email": "a@x.io", "v": 1}
+    assert cache.get("a@x.io", loader) == {"email": "a@x.io", "v": 1}
+    assert len(loads) == 1
+
+
+def test_save_during_load_wins(cache):
+    def loader():
+        # read v1 from MongoDB, then a save commits v2 and writes it through
+        cache.put("a@x.io", {"email": "a@x.io", "v": 2})
+        return {"email": "a@x.io", "v": 1}
+
+    assert cache.get("a@x.io", loader) == {"email": "a@x.io", "v": 1}
+    assert cache.lookup("a@x.io") == {"email": "a@x.io", "v": 2}
+    assert cache.stats()["fill_skipped"] == 1
+
+
+def test_invalidate_during_load_wins(cache):
+    cache.put("a@x.io", {"email": "a@x.io", "v": 1})
+
+    def loader():
+        cache.invalidate("a@x.io")
+        return {"email": "a@x.io", "v": 1}
+
+    cache.invalidate("a@x.io")
+    cache.get("a@x.io", loader)
+    assert cache.lookup("a@x.io") is None
+
+
+def test_put_replaces_tombstone(cache):
+    cache.put("a@x.io", {"email": "a@x.io", "v": 1})
+    cache.invalidate("a@x.io")
+    assert cache.lookup("a@x.io") is None
+    cache.put("a@x.io", {"email": "a@x.io", "v": 2})
+    assert cache.lookup("a@x.io") == {"email": "a@x.io", "v": 2}
+
+
+def test_disabled():
+    cache = ProfileCache(ttl=0)
+    cache.put("a@x.io", {"v": 1})
+    assert cache.get("a@x.io", lambda: {"v": 2}) == {"v": 2}
+    assert cache.lookup("a@x.io") is None
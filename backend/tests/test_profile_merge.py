@@ -0,0 +1,145 @@
+# test_profile_merge.py
+#
+# merge_profile() must leave the stored profile exactly as the old
+# read-modify-write deep_merge() did (kept below as the reference). The
+# store is a small in-memory stand-in for MongoDB's $set / $setOnInsert
+# that, like the server, refuses a dotted path through a non-document
+# with PATH_NOT_VIABLE.
+#
+#   cd backend && python -m pytest -q tests/test_profile_merge.py
+
+import copy
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from profile_merge import PATH_NOT_VIABLE, flatten_set, merge_profile
+
+
+def deep_merge(a, b):
+    # the original save-fullinfo merge
+    for k, v in b.items():
+        if k in a and isinstance(a[k], dict) and isinstance(v, dict):
+            deep_merge(a[k], v)
+        else:
+            a[k] = v
+    return a
+
+
+class Store:
+    """One user document; update() applies $set / $setOnInsert like MongoDB."""
+
+    def __init__(self, doc=None):
+        self.doc = doc
+        self.updates = []
+
+    def update(self, update):
+        self.updates.append(update)
+        if self.doc is None:
+            self.doc = {}
+            for path, value in update.get("$setOnInsert", {}).items():
+                self._set(path, value)
+        for path, value in update.get("$set", {}).items():
+            self._set(path, value)
+        return self.doc
+
+    def _set(self, path, value):
+        *parents, leaf = path.split(".")
+        node = self.doc
+        for part in parents:
+            if part not in node:
+                node[part] = {}
+            elif not isinstance(node[part], dict):
+                raise OperationFailure(f"Cannot create field '{leaf}' in element {{{part}: ...}}", code=PATH_NOT_VIABLE)
+            node = node[part]
+        node[leaf] = copy.deepcopy(value)
+
+    def profile(self):
+        return (self.doc or {}).get("profile")
+
+
+def save(store, payload):
+    merge_profile(payload, store.update, store.profile)
+    return store.profile()
+
+
+STORED = {
+    "skills": ["Python"],
+    "personal": {"name": "A", "age": 3, "address": {"city": "P", "zip": "1"}},
+    "education": ["BSc"],
+    "notes": None,
+    "personality": {"type": "analytical"},
+}
+
+PAYLOADS = [
+    {"personal": {"age": 4}},
+    {"personal": {"address": {"city": "Q"}}, "skills": ["Go", "SQL"]},
+    {"personal": {"address": "unknown"}},
+    {"education": {"level": "UG"}},                     # dict over a stored list
+    {"notes": {"a": 1}},                                # dict over a stored null
+    {"education": {"level": "UG"}, "personal": {"age": 5}},
+    {"personality": {}},                                # {} onto a document: no change
+    {"hobbies": {}},                                    # {} where nothing is stored
+    {"education": {}},                                  # {} over a stored list
+    {"personal": {"address": {}}, "extra": {"x": {}}},
+    {"links": {"github.com": "a", "$ref": "b"}},        # keys that can't be path parts
+    {"personal": {"urls": {"a.b": 1}}},
+    {},
+]
+
+
+def test_leaf_paths():
+    paths = flatten_set({"personal": {"age": 4, "address": {"city": "Q"}}, "skills": ["Go"]}, "profile")
+    assert paths == {
+        "profile.personal.age": 4,
+        "profile.personal.address.city": "Q",
+        "profile.skills": ["Go"],
+    }
+
+
+def test_unusable_keys_set_whole():
+    paths = flatten_set({"links": {"github.com": "a"}, "meta": {"$x": 1, "y": 2}, "ok": {"y": 2}}, "profile")
+    assert paths == {
+        "profile.links": {"github.com": "a"},
+        "profile.meta": {"$x": 1, "y": 2},
+        "profile.ok.y": 2,
+    }
+
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_matches_deep_merge(payload):
+    store = Store({"email": "a@x.io", "profile": copy.deepcopy(STORED)})
+    want = deep_merge(copy.deepcopy(STORED), copy.deepcopy(payload))
+    assert save(store, payload) == want
+
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_first_save_matches_deep_merge(payload):
+    store = Store()
+    assert save(store, payload) == deep_merge({}, copy.deepcopy(payload))
+
+
+def test_stored_list_keeps_other_sections():
+    store = Store({"email": "a@x.io", "profile": copy.deepcopy(STORED)})
+    save(store, {"education": {"level": "UG"}, "personal": {"age": 5}})
+    # first attempt hits PATH_NOT_VIABLE; the retry replaces only education
+    first, retry = store.updates
+    assert "profile.education.level" in first["$set"]
+    assert retry["$set"] == {"profile.education": {"level": "UG"}, "profile.personal.age": 5}
+    assert store.profile()["personal"]["address"] == {"city": "P", "zip": "1"}
+    assert store.profile()["skills"] == ["Python"]
+
+
+def test_plain_save_reads_nothing():
+    store = Store({"email": "a@x.io", "profile": copy.deepcopy(STORED)})
+    reads = []
+    merge_profile({"personal": {"age": 4}}, store.update, lambda: reads.append(1) or store.profile())
+    assert reads == [] and len(store.updates) == 1
+
+
+def test_other_errors_propagate():
+    def update(doc):
+        raise OperationFailure("boom", code=2)
+
+    with pytest.raises(OperationFailure):
+        merge_profile({"personal": {"age": 4}}, update, lambda: None)
@@ -0,0 +1,244 @@
+# test_recommend_parity.py
+#
+# recommend() / recommend_batch() must rank careers exactly like the
+# original per-row WEIGHTS loop (kept below as the reference) did.
+# The reference reads the CSV itself, so snapshot or index bugs in
+# model.py can't leak into both sides.
+#
+#   cd backend && python -m pytest -q tests/test_recommend_parity.py
+#
+# test_every_dataset_row runs the reference once per dataset row (6000
+# pure-Python passes over 6000 rows), about a minute and a half.
+
+import json
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import model
+
+WEIGHTS = {
+    "skills": 0.25,
+    "interests": 0.20,
+    "strengths": 0.15,
+    "weaknesses": 0.05,
+    "learning_formats": 0.10,
+    "preferred_work_environment": 0.15,
+    "scalar_personality": 0.05,
+    "scalar_learning_mode": 0.03,
+    "scalar_salary": 0.02,
+}
+
+N_RANDOM = 300
+
+
+# --- reference implementation (the loop recommend() used to run) ---
+
+def parse_list(x):
+    if x is None or (isinstance(x, float) and np.isnan(x)):
+        return []
+    if isinstance(x, list):
+        return x
+    if isinstance(x, str):
+        s = x.strip()
+        if not s:
+            return []
+        try:
+            v = json.loads(s)
+            if isinstance(v, list):
+                return v
+        except Exception:
+            return [p.strip() for p in s.split(",") if p.strip()]
+    return []
+
+
+def to_set(lst):
+    return set(str(i).strip() for i in lst if str(i).strip())
+
+
+def list_similarity(u, r):
+    if not u:
+        return 0.0
+    return len(u & r) / max(len(u), 1)
+
+
+def list_penalty(u, r):
+    if not u:
+        return 0.0
+    return - len(u & r) / max(len(u), 1)
+
+
+def scalar_key(value):
+    """Falsy values never match; others compare stripped and lower-cased."""
+    return str(value).strip().lower() if value else None
+
+
+def scalar_similarity(u, r):
+    # on scalar_key()s: 1.0 if equal (case-insensitive), else 0
+    return 1.0 if u is not None and u == r else 0.0
+
+
+class Reference:
+    """
+    The original loop, with each row's to_set() and scalar lower-casing
+    hoisted out of it (both are pure, so the scores are the same) to keep
+    the run short.
+    """
+
+    def __init__(self):
+        df = pd.read_csv(model.DATA_PATH)
+        for col in model.LIST_COLS:
+            df[col] = df[col].apply(parse_list)
+        self.rows = df.to_dict("records")
+        self.sets = [{col: to_set(row[col]) for col in model.LIST_COLS} for row in self.rows]
+        self.keys = [{col: scalar_key(row.get(col)) for col in model.SCALAR_COLS} for row in self.rows]
+
+    def recommend(self, user_profile, top_k=3):
+        user = model.normalize_user_profile(user_profile)
+        u = {col: to_set(user.get(col, [])) for col in model.LIST_COLS}
+        uk = {col: scalar_key(user.get(col)) for col in model.SCALAR_COLS}
+
+        scores = []
+        for rs, rk in zip(self.sets, self.keys):
+            s_skills = list_similarity(u["skills"], rs["skills"])
+            s_intr = list_similarity(u["interests"], rs["interests"])
+            s_str = list_similarity(u["strengths"], rs["strengths"])
+            s_weak_pen = list_penalty(u["weaknesses"], rs["weaknesses"])
+            s_lf = list_similarity(u["learning_formats"], rs["learning_formats"])
+            s_work_env = list_similarity(u["preferred_work_environment"], rs["preferred_work_environment"])
+
+            s_p_type = scalar_similarity(uk["personality_work_type"], rk["personality_work_type"])
+            s_p_style = scalar_similarity(uk["personality_work_style"], rk["personality_work_style"])
+            s_p_env = scalar_similarity(uk["personality_env_pref"], rk["personality_env_pref"])
+            s_p_stress = scalar_similarity(uk["personality_stress_handling"], rk["personality_stress_handling"])
+            s_person = (s_p_type + s_p_style + s_p_env + s_p_stress) / 4.0
+
+            s_lp = scalar_similarity(uk["learning_pace"], rk["learning_pace"])
+            s_mode = scalar_similarity(uk["mode_preference"], rk["mode_preference"])
+            s_learn_mode = (s_lp + s_mode) / 2.0
+
+            s_salary = scalar_similarity(uk["salary_expectation"], rk["salary_expectation"])
+
+            score = 0.0
+            score += WEIGHTS["skills"] * s_skills
+            score += WEIGHTS["interests"] * s_intr
+            score += WEIGHTS["strengths"] * s_str
+            score += WEIGHTS["weaknesses"] * s_weak_pen
+            score += WEIGHTS["learning_formats"] * s_lf
+            score += WEIGHTS["preferred_work_environment"] * s_work_env
+            score += WEIGHTS["scalar_personality"] * s_person
+            score += WEIGHTS["scalar_learning_mode"] * s_learn_mode
+            score += WEIGHTS["scalar_salary"] * s_salary
+            scores.append(score)
+
+        if not scores:
+            return []
+
+        career_to_best, career_to_idx = {}, {}
+        for idx, row in enumerate(self.rows):
+            career = row["target_recommended_career"]
+            if career not in career_to_best or scores[idx] > career_to_best[career]:
+                career_to_best[career] = scores[idx]
+                career_to_idx[career] = idx
+
+        items = [(c, career_to_best[c], career_to_idx[c]) for c in career_to_best]
+        items.sort(key=lambda x: x[1], reverse=True)
+        items = items[:top_k]
+
+        max_score = max((s for _, s, _ in items), default=1.0)
+        if max_score == 0:
+            max_score = 1.0
+
+        results = []
+        for career, raw_score, idx in items:
+            row_skills = self.rows[idx]["skills"]
+            matched = list(u["skills"] & to_set(row_skills))
+            if not matched:
+                matched = row_skills[:5]
+            results.append({"career": career, "score": float(round(raw_score / max_score, 4)), "top_skills": matched})
+        return results
+
+
+# --- fixtures ---
+
+@pytest.fixture(scope="module")
+def reference():
+    return Reference()
+
+
+@pytest.fixture(autouse=True)
+def no_result_cache():
+    # compare scoring, not cached copies
+    model.RESULT_CACHE.clear()
+    yield
+    model.RESULT_CACHE.clear()
+
+
+def dataset_profiles(reference):
+    cols = model.LIST_COLS + model.SCALAR_COLS
+    return [{col: row[col] for col in cols} for row in reference.rows]
+
+
+def random_profiles(reference, n, seed=0):
+    rng = random.Random(seed)
+    vocab = {col: sorted({str(x) for s in reference.sets for x in s[col]}) for col in model.LIST_COLS}
+    values = {col: sorted({str(r[col]) for r in reference.rows if isinstance(r[col], str)}) for col in model.SCALAR_COLS}
+    out = []
+    for _ in range(n):
+        p = {}
+        for col in model.LIST_COLS:
+            p[col] = rng.sample(vocab[col], rng.randint(0, min(6, len(vocab[col]))))
+            if rng.random() < 0.1:
+                p[col].append(" Not In The Dataset ")
+        for col in model.SCALAR_COLS:
+            v = rng.choice(values[col] + [None, "", "unknown"])
+            p[col] = v.upper() if v and rng.random() < 0.2 else v
+        out.append(p)
+    return out
+
+
+def tie_profiles():
+    return [
+        {},                                               # every row scores 0
+        {"skills": ["Not In The Dataset"]},               # still all zeros
+        {"weaknesses": ["Not In The Dataset"]},
+        {"learning_pace": "moderate"},                    # many equal scalar-only scores
+        {"mode_preference": "online", "salary_expectation": "medium"},
+    ]
+
+
+def key(results):
+    return [(r["career"], r["score"], sorted(map(str, r["top_skills"]))) for r in results]
+
+
+# --- tests ---
+
+def test_every_dataset_row(reference):
+    profiles = dataset_profiles(reference)
+    got = model.recommend_batch(profiles, top_k=3)
+    for n, profile in enumerate(profiles):
+        assert key(got[n]) == key(reference.recommend(profile, 3)), f"dataset row {n}"
+
+
+def test_random_profiles(reference):
+    for n, profile in enumerate(random_profiles(reference, N_RANDOM)):
+        want = key(reference.recommend(profile, 5))
+        assert key(model.recommend(profile, 5)) == want, f"random profile {n}"
+
+
+@pytest.mark.parametrize("top_k", [0, 1, 3, 11, 12, 50])
+def test_top_k_ties(reference, top_k):
+    for profile in tie_profiles():
+        want = key(reference.recommend(profile, top_k))
+        assert key(model.recommend(profile, top_k)) == want
+        assert key(model.recommend_batch([profile], top_k)[0]) == want
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+def test_batch_matches_single(reference, chunk_size):
+    profiles = random_profiles(reference, 40, seed=1) + tie_profiles()
+    single = [model.recommend(p, 3) for p in profiles]
+    model.RESULT_CACHE.clear()
+    assert model.recommend_batch(profiles, 3, chunk_size=chunk_size) == single
@@ -0,0 +1,151 @@
+# test_token_cache.py
+#
+# TokenCache must accept exactly the tokens jwt.decode would (expiry at
+# int(exp)) and never accept a revoked one, in this worker or, through a
+# shared store, in another.
+#
+#   cd backend && python -m pytest -q tests/test_token_cache.py
+
+import jwt
+import pytest
+
+import token_cache
+from profile_cache import MemoryBackend
+from token_cache import TokenCache
+
+SECRET = "test-secret-at-least-32-bytes-long"
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(1_000_000.0)
+    monkeypatch.setattr(token_cache.time, "time", clock.time)
+    return clock
+
+
+def make_token(email, exp):
+    return jwt.encode({"email": email, "exp": exp}, SECRET, algorithm="HS256")
+
+
+def decoder(clock):
+    """jwt.decode at the fake time (PyJWT rejects once int(exp) <= now), counting calls."""
+    def decode(token):
+        decode.calls += 1
+        payload = jwt.decode(token, SECRET, algorithms=["HS256"], options={"verify_exp": False})
+        if int(payload["exp"]) <= clock.now:
+            raise jwt.ExpiredSignatureError("Signature has expired")
+        return payload
+    decode.calls = 0
+    return decode
+
+
+class Unreachable:
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("store down")
+        return fail
+
+
+def test_cached_until_int_exp(clock):
+    exp = clock.now + 10.7
+    token = make_token("a@x.io", exp)
+    decode = decoder(clock)
+    cache = TokenCache()
+    assert cache.email(token, decode) == "a@x.io"
+    assert cache.email(token, decode) == "a@x.io"
+    assert decode.calls == 1
+
+    clock.now = int(exp) - 0.001
+    assert cache.email(token, decode) == "a@x.io"
+    assert decode.calls == 1
+
+    # jwt.decode rejects once int(exp) <= now, even though exp itself is later
+    clock.now = int(exp)
+    assert cache.email(token, decode) is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_revoked_locally(clock):
+    token = make_token("a@x.io", clock.now + 60)
+    other = make_token("b@x.io", clock.now + 60)
+    decode = decoder(clock)
+    cache = TokenCache()
+    assert cache.email(token, decode) == "a@x.io"
+    assert cache.email(other, decode) == "b@x.io"
+
+    cache.revoke(token, clock.now + 60)
+    assert cache.email(token, decode) is None
+    assert cache.email(other, decode) == "b@x.io"
+    assert cache.stats()["rejected_revoked"] == 1
+
+
+def test_revocation_dropped_after_exp(clock):
+    token = make_token("a@x.io", clock.now + 60)
+    cache = TokenCache()
+    cache.revoke(token, clock.now + 60)
+    clock.now += 61
+    cache.revoke(make_token("b@x.io", clock.now + 60), clock.now + 60)
+    assert cache.stats()["revoked"] == 1
+
+
+def test_revocation_shared_through_store(clock):
+    store = MemoryBackend()
+    token = make_token("a@x.io", clock.now + 60)
+    decode = decoder(clock)
+    here = TokenCache(backend=store, sync_interval=3600)
+    there = TokenCache(backend=store, sync_interval=3600)
+    assert here.email(token, decode) == "a@x.io"
+    assert there.email(token, decode) == "a@x.io"
+
+    here.revoke(token, clock.now + 60)
+    assert here.email(token, decode) is None
+    # the other worker still has it cached until its next sync
+    assert there.email(token, decode) == "a@x.io"
+    assert there.sync()
+    assert there.email(token, decode) is None
+
+    # a worker that starts later loads the list before its first lookup
+    late = TokenCache(backend=store, sync_interval=3600)
+    assert late.email(token, decode) is None
+
+
+def test_store_prunes_expired_revocations(clock):
+    store = MemoryBackend()
+    cache = TokenCache(backend=store, sync_interval=3600)
+    cache.revoke(make_token("a@x.io", clock.now + 5), clock.now + 5)
+    clock.now += 10
+    assert cache.sync()
+    assert store.zrangebyscore(cache.key, "-inf", "+inf") == []
+    assert cache.stats()["revoked"] == 0
+
+
+def test_synced_revocations_survive_store_outage(clock):
+    store = MemoryBackend()
+    token = make_token("a@x.io", clock.now + 60)
+    decode = decoder(clock)
+    TokenCache(backend=store).revoke(token, clock.now + 60)
+    cache = TokenCache(backend=store, sync_interval=3600)
+    assert cache.email(token, decode) is None
+
+    cache.backend = Unreachable()
+    assert not cache.sync()
+    assert cache.email(token, decode) is None
+    assert cache.stats()["errors"] == 1
+
+
+def test_revoke_raises_when_store_down(clock):
+    token = make_token("a@x.io", clock.now + 60)
+    decode = decoder(clock)
+    cache = TokenCache(backend=Unreachable(), sync_interval=3600)
+    with pytest.raises(ConnectionError):
+        cache.revoke(token, clock.now + 60)
+    # still revoked in this worker
+    assert cache.email(token, decode) is None
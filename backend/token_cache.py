@@ -0,0 +1,176 @@
+# token_cache.py
+#
+# Cache of verified session JWTs for auth_required.
+# A page load makes several authenticated calls with the same token, and
+# each one used to re-check the HS256 signature and claims. TokenCache maps
+# a digest of the token (never the token itself) to (email, exp) after
+# the first successful decode; an entry is served only while time.time()
+# < int(exp), i.e. exactly as long as jwt.decode (which truncates exp to
+# an int) would still accept the token.
+# Revoked tokens are kept in a separate set until their exp and are
+# rejected before either the cache or the decoder is consulted.
+#
+# With a shared `backend` (the profile cache's Redis) revocations are also
+# added to a sorted set there (member: digest, score: exp), and a daemon
+# thread re-reads that set every `sync_interval` seconds into the local
+# set, so a logout in one worker applies in all of them within that
+# interval while lookups stay in-process. Without one they only apply in
+# this process.
+# When the store is unreachable the check fails open for what this worker
+# hasn't seen yet: revocations already synced stay in force until their
+# exp, revocations made elsewhere during the outage are picked up by the
+# first sync that succeeds, and revoke() raises so the logout reports failure.
+
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def token_key(token):
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+
+class TokenCache:
+    """
+    email(token, decode) -> email or None; decode(token) returns the
+    verified payload or raises. Only tokens with a numeric exp are cached.
+    backend: optional shared store (zadd / zrangebyscore / zremrangebyscore
+    like Redis) for revocations, synced every `sync_interval` seconds.
+    """
+
+    def __init__(self, maxsize=10_000, backend=None, key="revoked_tokens", sync_interval=1.0):
+        self.maxsize = max(0, int(maxsize))
+        self.backend = backend
+        self.key = key
+        self.sync_interval = sync_interval
+        self._data = OrderedDict()
+        self._revoked = {}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._synced_at = None
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+        self._rejected_revoked = 0
+        self._syncs = 0
+        self._errors = 0
+
+    @property
+    def shared(self):
+        return self.backend is not None
+
+    def sync(self):
+        """Merge the store's current revocation list into the local set; False if unreachable."""
+        now = time.time()
+        try:
+            self.backend.zremrangebyscore(self.key, "-inf", now)
+            entries = self.backend.zrangebyscore(self.key, now, "+inf", withscores=True)
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            return False
+        with self._lock:
+            # keep local entries too: a revoke() whose zadd failed still applies here
+            revoked = {k: e for k, e in self._revoked.items() if e > now}
+            for member, exp in entries:
+                if isinstance(member, bytes):
+                    member = member.decode("ascii")
+                key = bytes.fromhex(member)
+                revoked[key] = max(exp, revoked.get(key, 0))
+                self._data.pop(key, None)
+            self._revoked = revoked
+            self._synced_at = time.monotonic()
+            self._syncs += 1
+        return True
+
+    def _ensure_sync(self):
+        # threads don't survive fork: start one lazily in whichever process authenticates
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        # first lookup in this process: load the list before accepting anything
+        self.sync()
+        threading.Thread(target=self._run, name="token-revocations", daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.sync_interval)
+            self.sync()
+
+    def email(self, token, decode):
+        if self.backend is not None:
+            self._ensure_sync()
+        key = token_key(token)
+        now = time.time()
+        with self._lock:
+            exp = self._revoked.get(key)
+            if exp is not None:
+                if now < exp:
+                    self._rejected_revoked += 1
+                    return None
+                del self._revoked[key]
+            item = self._data.get(key)
+            if item is not None:
+                email, exp = item
+                if now < exp:
+                    self._data.move_to_end(key)
+                    self._hits += 1
+                    return email
+                del self._data[key]
+                self._expired += 1
+            self._misses += 1
+
+        try:
+            payload = decode(token)
+        except Exception:
+            return None
+        email = payload.get("email")
+        exp = payload.get("exp")
+        if email and isinstance(exp, (int, float)) and self.maxsize:
+            with self._lock:
+                if key not in self._revoked:
+                    self._data[key] = (email, int(exp))
+                    self._data.move_to_end(key)
+                    while len(self._data) > self.maxsize:
+                        self._data.popitem(last=False)
+                        self._evictions += 1
+        return email
+
+    def revoke(self, token, exp):
+        """
+        Reject `token` from now until its exp (after which jwt.decode rejects
+        it anyway). Raises if the shared store can't record it.
+        """
+        key = token_key(token)
+        now = time.time()
+        with self._lock:
+            self._data.pop(key, None)
+            self._revoked = {k: e for k, e in self._revoked.items() if e > now}
+            self._revoked[key] = exp
+        if self.backend is not None:
+            self.backend.zadd(self.key, {key.hex(): exp})
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "expired": self._expired,
+                "evictions": self._evictions,
+                "shared": self.backend is not None,
+                "revoked": len(self._revoked),
+                "rejected_revoked": self._rejected_revoked,
+                "syncs": self._syncs,
+                "synced_ago": round(time.monotonic() - self._synced_at, 1) if self._synced_at is not None else None,
+                "errors": self._errors,
+            }
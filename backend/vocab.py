@@ -0,0 +1,98 @@
+# vocab.py
+#
+# Interned vocabularies: one dense int ID per distinct skill / interest /
+# strength / weakness / learning format / work-environment label (and per
+# scalar answer). The dataset rows, incoming user profiles and the master_*
+# collections all go through the same tables.
+
+import threading
+
+import numpy as np
+
+
+def clean_label(value):
+    """List-item key, same as model.to_set(): str + strip, '' means missing."""
+    s = str(value).strip()
+    return s or None
+
+
+def scalar_key(value):
+    """Scalar key, same as model.scalar_similarity(): falsy is missing, else strip + lower."""
+    if not value:
+        return None
+    return str(value).strip().lower()
+
+
+class Vocabulary:
+    """
+    Label <-> dense int ID table for one field.
+    IDs are assigned in insertion order and never change, so arrays built from
+    the dataset (IDs 0..n_dataset-1) stay valid when master-list names are
+    appended later.
+    """
+
+    # raw spellings remembered per table (" Python", "Python ", ...)
+    RAW_CACHE_LIMIT = 100_000
+
+    def __init__(self, names=(), key=clean_label):
+        self.key = key
+        self.names = []
+        self._ids = {}
+        self._raw = {}
+        self._lock = threading.Lock()
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, value):
+        return self.get(value) is not None
+
+    def add(self, value):
+        """Intern a label and return its ID (None for empty labels)."""
+        k = self.key(value)
+        if k is None:
+            return None
+        i = self._ids.get(k)
+        if i is None:
+            with self._lock:
+                i = self._ids.get(k)
+                if i is None:
+                    # publish the name before the ID so readers never see a dangling ID
+                    i = len(self.names)
+                    self.names.append(k)
+                    self._ids[k] = i
+        return i
+
+    def get(self, value):
+        """ID of a raw label, or None if it is empty or unknown."""
+        if isinstance(value, str):
+            i = self._raw.get(value)
+            if i is not None:
+                return i
+        k = self.key(value)
+        if k is None:
+            return None
+        i = self._ids.get(k)
+        # only hits are remembered, so a later add() can't be shadowed
+        if i is not None and isinstance(value, str) and len(self._raw) < self.RAW_CACHE_LIMIT:
+            self._raw[value] = i
+        return i
+
+    def encode(self, values):
+        """
+        Raw list -> (sorted unique known IDs as int32 array, number of distinct labels).
+        The count includes unknown labels, matching len(to_set(values)).
+        """
+        ids = set()
+        unknown = set()
+        for v in values:
+            i = self.get(v)
+            if i is not None:
+                ids.add(i)
+            else:
+                k = self.key(v)
+                if k is not None:
+                    unknown.add(k)
+        return np.fromiter(sorted(ids), dtype=np.int32, count=len(ids)), len(ids) + len(unknown)
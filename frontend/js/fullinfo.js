@@ -466,17 +466,55 @@ const certFileEl = document.getElementById("certFile");
   currentEducationEl && currentEducationEl.addEventListener("change", handleEducationVisibility);
 
   // ---------- suggestions fetchers ----------
-  async function fetchSuggestions(path) {
+  // all four master lists in one request; the last copy is kept in
+  // localStorage and only names added since its version are fetched,
+  // with a full refetch once a day as a backstop
+  const MASTER_LISTS_FULL_REFRESH_MS = 24 * 60 * 60 * 1000;
+
+  // MongoDB's name order: code point order (JS .sort() compares UTF-16 units)
+  function compareCodePoints(a, b) {
+    const x = Array.from(a), y = Array.from(b);
+    const n = Math.min(x.length, y.length);
+    for (let i = 0; i < n; i++) {
+      const d = x[i].codePointAt(0) - y[i].codePointAt(0);
+      if (d) return d;
+    }
+    return x.length - y.length;
+  }
+
+  async function fetchMasterLists() {
+    const empty = { skills: [], interests: [], strengths: [], weaknesses: [] };
+    let cached = null;
+    try {
+      cached = JSON.parse(localStorage.getItem("masterLists") || "null");
+    } catch (e) {
+      cached = null;
+    }
     try {
-      const res = await fetch(`${API_BASE}/${path}`);
-      if (!res.ok) throw new Error("no-suggest");
+      const fresh = cached && Number.isInteger(cached.version)
+        && Date.now() - (cached.fetchedAt || 0) < MASTER_LISTS_FULL_REFRESH_MS;
+      const qs = fresh ? `?since=${cached.version}` : "";
+      const res = await fetch(`${API_BASE}/api/master-lists${qs}`);
+      if (!res.ok) throw new Error("no-master-lists");
       const data = await res.json();
-      if (Array.isArray(data)) return data;
-      if (Array.isArray(data.suggestions)) return data.suggestions;
-      return [];
+      let lists = data.lists || {};
+      let fetchedAt = Date.now();
+      if (data.since !== null && data.since !== undefined && cached) {
+        // delta (may repeat names we have): merge, keep the server's order
+        const merged = {};
+        Object.keys(empty).forEach(k => {
+          const names = new Set([...(cached.lists[k] || []), ...(lists[k] || [])]);
+          merged[k] = [...names].sort(compareCodePoints);
+        });
+        lists = merged;
+        fetchedAt = cached.fetchedAt;
+      }
+      lists = Object.assign({}, empty, lists);
+      localStorage.setItem("masterLists", JSON.stringify({ version: data.version, fetchedAt, lists }));
+      return lists;
     } catch (e) {
-      console.error("fetchSuggestions error:", e);
-      return [];
+      console.error("fetchMasterLists error:", e);
+      return cached ? Object.assign({}, empty, cached.lists) : empty;
     }
   }
 
@@ -1470,11 +1508,11 @@ if (weaknessSearchInput) {
   // ---------- init: fetch master suggestions + load profile ----------
   async function initSuggestionsAndProfile() {
     // fetch masters (DB-driven)
-    state.skillSuggestions = await fetchSuggestions("api/get-skills");
-    state.interestSuggestions = await fetchSuggestions("api/get-interests");
-    // strengths/weaknesses suggestions (backend endpoints added)
-    state.strengthSuggestions = await fetchSuggestions("api/get-strengths");
-    state.weaknessSuggestions = await fetchSuggestions("api/get-weaknesses");
+    const masters = await fetchMasterLists();
+    state.skillSuggestions = masters.skills;
+    state.interestSuggestions = masters.interests;
+    state.strengthSuggestions = masters.strengths;
+    state.weaknessSuggestions = masters.weaknesses;
 
     // populate initial suggestions preview (first few)
     renderSkillSuggestions(state.skillSuggestions.slice(0, 8));
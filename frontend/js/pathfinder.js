@@ -2,6 +2,7 @@
 
 const API_BASE = "https://eduguide-tdl3.onrender.com"; // production API base
 let userProfile = null;
+let roadmapsByCareer = {}; // career -> personalized roadmap from /api/pathfinder
 
 // Convert a string to Title Case (each word capitalized)
 function toTitle(str) {
@@ -81,17 +82,17 @@ async function runRecommendations() {
   if (resultsSection) resultsSection.classList.add("d-none");
 
   try {
-    // 1. Fetch full profile (also refresh global userProfile)
-    const profileRes = await fetch(`${API_BASE}/api/get-fullinfo`, {
+    // 1. Profile + recommendations + roadmaps in one round trip
+    const recoRes = await fetch(`${API_BASE}/api/pathfinder?top_k=3`, {
       headers: {
         "Authorization": "Bearer " + token
       }
     });
 
-    const profileJson = await profileRes.json();
-    console.log("Fetched profile from /api/get-fullinfo:", profileJson);
+    const reco = await recoRes.json();
+    console.log("Pathfinder response:", reco);
 
-    if (!profileJson.success || !profileJson.profile || Object.keys(profileJson.profile).length === 0) {
+    if (recoRes.status === 404 || (reco.success && (!reco.profile || Object.keys(reco.profile).length === 0))) {
       if (loadingBox) {
         loadingBox.innerHTML = `
           <h5 class="text-danger fw-bold">Complete your full info first.</h5>
@@ -101,22 +102,6 @@ async function runRecommendations() {
       return;
     }
 
-    // update global profile used by roadmap
-    userProfile = profileJson.profile;
-
-    // 2. Call recommendation API
-    const recoRes = await fetch(`${API_BASE}/api/recommend`, {
-      method: "POST",
-      headers: {
-        "Authorization": "Bearer " + token,
-        "Content-Type": "application/json"
-      },
-      body: JSON.stringify({ profile: userProfile }) // backend expects { profile: {...} }
-    });
-
-    const reco = await recoRes.json();
-    console.log("Reco response:", reco);
-
     if (!reco.success || !Array.isArray(reco.results) || reco.results.length === 0) {
       if (loadingBox) {
         loadingBox.innerHTML = `<h5 class="text-danger fw-bold">Unable to generate recommendations.</h5>`;
@@ -124,6 +109,13 @@ async function runRecommendations() {
       return;
     }
 
+    // update global profile + roadmaps used by the roadmap buttons
+    userProfile = reco.profile;
+    roadmapsByCareer = {};
+    reco.results.forEach(item => {
+      if (item.roadmap) roadmapsByCareer[item.career] = item.roadmap;
+    });
+
     const top3 = reco.results.slice(0, 3);
 
     // 3. Hide loader, show results
@@ -193,6 +185,11 @@ document.addEventListener("click", async (e) => {
 });
 
 async function handleRoadmapClick(career) {
+  if (roadmapsByCareer[career]) {
+    renderRoadmap(roadmapsByCareer[career]);
+    return;
+  }
+
   if (!userProfile) {
     console.error("User profile not loaded yet");
     alert("Profile not loaded yet. Please refresh the page.");